@@ -1,9 +1,12 @@
 from phi.agent import Agent
 from phi.model.groq import Groq
 from dotenv import load_dotenv
+from agent_tracing import enable_tracing
 from phi.tools.yfinance import YFinanceTools
 
 load_dotenv()
+# Writes model/tool call spans to $AGENT_TRACE_FILE when it is set
+enable_tracing()
 
 # Create an instance of the Agent
 agent_instance = Agent(
@@ -16,6 +19,7 @@ agent_instance = Agent(
 
 )
 
-# Call the print_response method on the instance
-agent_instance.print_response("Summerize and compare analyst recommendations and fundamentals for TSLA and AAPL.")
+if __name__ == "__main__":
+    # Call the print_response method on the instance
+    agent_instance.print_response("Summerize and compare analyst recommendations and fundamentals for TSLA and AAPL.")
 
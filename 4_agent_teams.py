@@ -3,9 +3,12 @@ from phi.model.groq import Groq
 from phi.tools.duckduckgo import DuckDuckGo
 from phi.tools.yfinance import YFinanceTools
 from dotenv import load_dotenv
+from agent_tracing import enable_tracing
 
 # Load environment variables
 load_dotenv()
+# Writes model/tool call spans to $AGENT_TRACE_FILE when it is set
+enable_tracing()
 
 web_agent = Agent(
     name="Web Agent",
@@ -34,4 +37,5 @@ agent_team_lead = Agent(
     debug_mode=True,
 )
 
-agent_team_lead.print_response("Summerize analyst recommendations and stock price then share the latest news for NVDA.")
+if __name__ == "__main__":
+    agent_team_lead.print_response("Summerize analyst recommendations and stock price then share the latest news for NVDA.")
@@ -0,0 +1,487 @@
+import argparse
+import contextvars
+import functools
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Team leads hand work to members through tools named transfer_task_to_<agent>
+DELEGATION_PREFIX = "transfer_task_to_"
+
+_current_span: contextvars.ContextVar[Optional['Span']] = contextvars.ContextVar('agent_span', default=None)
+_tracer: Optional['Tracer'] = None
+_originals: Dict[str, Any] = {}
+
+
+class Span:
+    """One timed unit of work: an agent run, a model call or a tool call"""
+
+    __slots__ = ('tracer', 'trace_id', 'span_id', 'parent_id', 'name', 'kind', 'agent', 'start',
+                 'started', 'attributes', 'error', 'ended')
+
+    def __init__(self, tracer: 'Tracer', name: str, kind: str, agent: Optional[str] = None,
+                 parent: Optional['Span'] = None, **attributes):
+        self.tracer = tracer
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent.span_id if parent else None
+        self.name = name
+        self.kind = kind
+        self.agent = agent or (parent.agent if parent else None)
+        self.start = time.time()
+        self.started = time.perf_counter()
+        self.attributes: Dict[str, Any] = {'retries': 0, **attributes}
+        self.error: Optional[str] = None
+        self.ended = False
+
+    def set(self, **attributes) -> None:
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        if self.ended:
+            return
+        self.ended = True
+        if error is not None and self.error is None:
+            self.error = f"{type(error).__name__}: {error}"
+        self.tracer.write(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'trace_id': self.trace_id,
+            'span_id': self.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'service': self.tracer.service,
+            'agent': self.agent,
+            'start': round(self.start, 6),
+            'duration_ms': round((time.perf_counter() - self.started) * 1000, 3),
+            'status': 'error' if self.error else 'ok',
+            'error': self.error,
+            **self.attributes,
+        }
+
+
+class Tracer:
+    """
+    Appends finished spans to a JSONL file, one object per line
+
+    Span ids follow the OpenTelemetry shape (32 hex trace id, 16 hex span
+    id, parent id), so the file can be converted to OTLP if needed.
+    """
+
+    def __init__(self, path: str, service: Optional[str] = None):
+        self.path = path
+        self.service = service or os.path.splitext(os.path.basename(sys.argv[0] or 'python'))[0]
+        self.lock = threading.Lock()
+        self.file = open(path, 'a', encoding='utf-8', buffering=1)
+
+    def start_span(self, name: str, kind: str, agent: Optional[str] = None, **attributes) -> Span:
+        return Span(self, name, kind, agent, _current_span.get(), **attributes)
+
+    def write(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self.lock:
+            self.file.write(line + '\n')
+
+    def close(self) -> None:
+        with self.lock:
+            self.file.close()
+
+
+def _size(value: Any) -> int:
+    if value is None:
+        return 0
+    if isinstance(value, (bytes, bytearray)):
+        return len(value)
+    if isinstance(value, str):
+        return len(value.encode('utf-8'))
+    try:
+        return len(json.dumps(value, default=str).encode('utf-8'))
+    except (TypeError, ValueError):
+        return len(str(value).encode('utf-8'))
+
+
+def _record_usage(span: Span, usage: Any) -> None:
+    if usage is None:
+        return
+    prompt = getattr(usage, 'prompt_tokens', None) or 0
+    completion = getattr(usage, 'completion_tokens', None) or 0
+    span.set(prompt_tokens=span.attributes.get('prompt_tokens', 0) + prompt,
+             completion_tokens=span.attributes.get('completion_tokens', 0) + completion)
+
+
+def _traced_iterator(iterator, span: Span, on_item=None):
+    """Keep `span` current while the wrapped generator runs and end it when exhausted"""
+    try:
+        while True:
+            token = _current_span.set(span)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            finally:
+                _current_span.reset(token)
+            if on_item is not None:
+                on_item(item)
+            yield item
+    except BaseException as e:
+        span.end(e)
+        raise
+    finally:
+        span.end()
+
+
+async def _traced_async_iterator(iterator, span: Span, on_item=None):
+    try:
+        while True:
+            token = _current_span.set(span)
+            try:
+                item = await iterator.__anext__()
+            except StopAsyncIteration:
+                break
+            finally:
+                _current_span.reset(token)
+            if on_item is not None:
+                on_item(item)
+            yield item
+    except BaseException as e:
+        span.end(e)
+        raise
+    finally:
+        span.end()
+
+
+def _run_in_span(span: Span, fn, *args, **kwargs):
+    token = _current_span.set(span)
+    try:
+        return fn(*args, **kwargs)
+    except BaseException as e:
+        span.end(e)
+        raise
+    finally:
+        _current_span.reset(token)
+
+
+async def _arun_in_span(span: Span, fn, *args, **kwargs):
+    token = _current_span.set(span)
+    try:
+        return await fn(*args, **kwargs)
+    except BaseException as e:
+        span.end(e)
+        raise
+    finally:
+        _current_span.reset(token)
+
+
+def _agent_span(agent) -> Span:
+    model = getattr(agent, 'model', None)
+    return _tracer.start_span('agent.run', 'agent', agent.name or 'Agent', model=getattr(model, 'id', None))
+
+
+def _model_span(model, messages) -> Span:
+    span = _tracer.start_span('model.invoke', 'model', model=model.id, messages=len(messages))
+    span.set(prompt_tokens=0, completion_tokens=0)
+    return span
+
+
+def _finish_completion(span: Span, response) -> None:
+    _record_usage(span, getattr(response, 'usage', None))
+    span.attributes.setdefault('response_bytes', len(response.to_json(indent=None)) if hasattr(response, 'to_json')
+                               else _size(str(response)))
+    span.end()
+
+
+def _stream_chunk_recorder(span: Span):
+    span.set(response_bytes=0)
+
+    def record(chunk) -> None:
+        choices = getattr(chunk, 'choices', None) or []
+        for choice in choices:
+            delta = getattr(choice, 'delta', None)
+            span.attributes['response_bytes'] += _size(getattr(delta, 'content', None))
+            if getattr(delta, 'tool_calls', None):
+                span.attributes['response_bytes'] += _size([call.model_dump() for call in delta.tool_calls])
+        # Groq reports usage on the last chunk under x_groq
+        _record_usage(span, getattr(getattr(chunk, 'x_groq', None), 'usage', None))
+
+    return record
+
+
+def _install_patches() -> None:
+    """Wrap phi's Agent runs, Groq model calls and tool calls (idempotent)"""
+    if _originals:
+        return
+    from phi.agent import Agent
+    from phi.model.groq import Groq
+    from phi.tools.function import FunctionCall
+
+    _originals.update({
+        'Agent.run': Agent.run, 'Agent.arun': Agent.arun,
+        'Groq.invoke': Groq.invoke, 'Groq.ainvoke': Groq.ainvoke,
+        'Groq.invoke_stream': Groq.invoke_stream, 'Groq.ainvoke_stream': Groq.ainvoke_stream,
+        'FunctionCall.execute': FunctionCall.execute,
+    })
+
+    @functools.wraps(_originals['Agent.run'])
+    def run(self, *args, **kwargs):
+        if _tracer is None:
+            return _originals['Agent.run'](self, *args, **kwargs)
+        span = _agent_span(self)
+        result = _run_in_span(span, _originals['Agent.run'], self, *args, **kwargs)
+        if hasattr(result, '__next__'):
+            # stream=True: the run happens as the caller iterates
+            return _traced_iterator(result, span)
+        span.end()
+        return result
+
+    @functools.wraps(_originals['Agent.arun'])
+    async def arun(self, *args, **kwargs):
+        if _tracer is None:
+            return await _originals['Agent.arun'](self, *args, **kwargs)
+        span = _agent_span(self)
+        result = await _arun_in_span(span, _originals['Agent.arun'], self, *args, **kwargs)
+        if hasattr(result, '__aiter__'):
+            return _traced_async_iterator(result.__aiter__(), span)
+        span.end()
+        return result
+
+    @functools.wraps(_originals['Groq.invoke'])
+    def invoke(self, messages):
+        if _tracer is None:
+            return _originals['Groq.invoke'](self, messages)
+        span = _model_span(self, messages)
+        response = _run_in_span(span, _originals['Groq.invoke'], self, messages)
+        _finish_completion(span, response)
+        return response
+
+    @functools.wraps(_originals['Groq.ainvoke'])
+    async def ainvoke(self, messages):
+        if _tracer is None:
+            return await _originals['Groq.ainvoke'](self, messages)
+        span = _model_span(self, messages)
+        response = await _arun_in_span(span, _originals['Groq.ainvoke'], self, messages)
+        _finish_completion(span, response)
+        return response
+
+    @functools.wraps(_originals['Groq.invoke_stream'])
+    def invoke_stream(self, messages):
+        if _tracer is None:
+            return _originals['Groq.invoke_stream'](self, messages)
+        span = _model_span(self, messages)
+        return _traced_iterator(_originals['Groq.invoke_stream'](self, messages), span,
+                                _stream_chunk_recorder(span))
+
+    @functools.wraps(_originals['Groq.ainvoke_stream'])
+    def ainvoke_stream(self, messages):
+        if _tracer is None:
+            return _originals['Groq.ainvoke_stream'](self, messages)
+        span = _model_span(self, messages)
+        return _traced_async_iterator(_originals['Groq.ainvoke_stream'](self, messages), span,
+                                      _stream_chunk_recorder(span))
+
+    @functools.wraps(_originals['FunctionCall.execute'])
+    def execute(self):
+        if _tracer is None:
+            return _originals['FunctionCall.execute'](self)
+        name = self.function.name
+        kind = 'delegation' if name.startswith(DELEGATION_PREFIX) else 'tool'
+        span = _tracer.start_span(name, kind, request_bytes=_size(self.arguments))
+        success = _run_in_span(span, _originals['FunctionCall.execute'], self)
+        if not success:
+            span.error = self.error or 'Tool call failed'
+        if hasattr(self.result, '__next__'):
+            # Team delegation returns a generator; the member agent runs while it is consumed
+            span.set(response_bytes=0)
+
+            def record(item) -> None:
+                span.attributes['response_bytes'] += _size(item)
+
+            self.result = _traced_iterator(self.result, span, record)
+            return success
+        span.set(response_bytes=_size(self.result))
+        span.end()
+        return success
+
+    Agent.run = run
+    Agent.arun = arun
+    Groq.invoke = invoke
+    Groq.ainvoke = ainvoke
+    Groq.invoke_stream = invoke_stream
+    Groq.ainvoke_stream = ainvoke_stream
+    FunctionCall.execute = execute
+    _install_retry_hook()
+
+
+def _install_retry_hook() -> None:
+    """
+    Count SDK-level retries and exact request sizes. The groq client builds
+    a fresh request for every attempt with its retry number, so wrapping that
+    step sees each retry of the current model call.
+    """
+    try:
+        from groq._base_client import BaseClient
+    except ImportError:
+        logger.debug("groq client internals not found; retries will not be counted")
+        return
+    original = _originals['BaseClient._build_request'] = BaseClient._build_request
+
+    @functools.wraps(original)
+    def build_request(self, options, *args, **kwargs):
+        request = original(self, options, *args, **kwargs)
+        span = _current_span.get()
+        if _tracer is not None and span is not None and span.kind == 'model':
+            span.set(retries=max(span.attributes['retries'], kwargs.get('retries_taken', 0)),
+                     request_bytes=len(request.content or b''))
+        return request
+
+    BaseClient._build_request = build_request
+
+
+def enable_tracing(path: Optional[str] = None, service: Optional[str] = None) -> Optional[Tracer]:
+    """
+    Trace every agent run, Groq model call and tool call to a JSONL file
+
+    Does nothing unless a path is given or AGENT_TRACE_FILE is set, so agent
+    scripts can call it unconditionally.
+
+    Args:
+        path (str): JSONL file spans are appended to (default: $AGENT_TRACE_FILE)
+        service (str): Name recorded on every span (default: the script name)
+
+    Returns:
+        Tracer: The active tracer, or None when tracing is off
+    """
+    global _tracer
+    path = path or os.getenv('AGENT_TRACE_FILE')
+    if not path:
+        return None
+    if _tracer is not None:
+        if os.path.abspath(_tracer.path) == os.path.abspath(path):
+            return _tracer
+        _tracer.close()
+    _install_patches()
+    _tracer = Tracer(path, service)
+    logger.info(f"Tracing agent runs to {path}")
+    return _tracer
+
+
+def disable_tracing() -> None:
+    global _tracer
+    if _tracer is not None:
+        _tracer.close()
+        _tracer = None
+
+
+def load_spans(path: str) -> List[Dict[str, Any]]:
+    spans = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                spans.append(json.loads(line))
+    return spans
+
+
+def _tokens(span: Dict[str, Any]) -> int:
+    return (span.get('prompt_tokens') or 0) + (span.get('completion_tokens') or 0)
+
+
+def summarize(spans: Iterable[Dict[str, Any]], top: int = 10) -> str:
+    """
+    Report of the slowest spans, token use per agent and the calls that
+    consumed the most tokens
+
+    Args:
+        spans (iterable): Span dicts as written by Tracer
+        top (int): Rows in the slowest-span and token-hotspot tables
+
+    Returns:
+        str: Plain-text report
+    """
+    spans = list(spans)
+
+    def label(span):
+        return f"{span.get('agent') or '-'} / {span['name']}"
+
+    children: Dict[Optional[str], List[Dict[str, Any]]] = defaultdict(list)
+    for span in spans:
+        children[span.get('parent_id')].append(span)
+
+    def after(span):
+        # The tool calls since the previous model call, whose results this call is reading
+        previous = [s for s in children[span.get('parent_id')] if s['start'] < span['start']]
+        last_model = max((s['start'] for s in previous if s['kind'] == 'model'), default=None)
+        if last_model is None:
+            return 'first call'
+        tools = [s['name'] for s in previous if s['kind'] in ('tool', 'delegation') and s['start'] > last_model]
+        return 'after ' + ', '.join(tools) if tools else 'follow-up'
+
+    lines = [f"{len(spans)} spans, {len({span['trace_id'] for span in spans})} traces", ""]
+
+    lines.append(f"Slowest {top} spans")
+    lines.append(f"{'ms':>10}  {'kind':<10}  {'tokens':>7}  {'retries':>7}  span")
+    for span in sorted(spans, key=lambda s: s['duration_ms'], reverse=True)[:top]:
+        error = f"  [{span['error']}]" if span.get('error') else ''
+        lines.append(f"{span['duration_ms']:>10.1f}  {span['kind']:<10}  {_tokens(span):>7}  "
+                     f"{span.get('retries', 0):>7}  {label(span)}{error}")
+
+    totals: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for span in spans:
+        agent = totals[span.get('agent') or '-']
+        kind = span['kind']
+        agent[f'{kind}_calls'] += 1
+        agent[f'{kind}_ms'] += span['duration_ms']
+        agent['prompt_tokens'] += span.get('prompt_tokens') or 0
+        agent['completion_tokens'] += span.get('completion_tokens') or 0
+        agent['retries'] += span.get('retries') or 0
+        agent['errors'] += span.get('status') == 'error'
+        if kind in ('tool', 'delegation'):
+            agent['tool_result_bytes'] += span.get('response_bytes') or 0
+
+    lines += ["", "Per agent"]
+    lines.append(f"{'agent':<20}  {'runs':>5}  {'model calls':>11}  {'model ms':>10}  {'tool calls':>10}  "
+                 f"{'tool ms':>10}  {'prompt tok':>10}  {'compl tok':>10}  {'tool out B':>10}  "
+                 f"{'retries':>7}  {'errors':>6}")
+    for name, agent in sorted(totals.items(), key=lambda item: -(item[1]['prompt_tokens'] + item[1]['completion_tokens'])):
+        tool_calls = agent['tool_calls'] + agent['delegation_calls']
+        tool_ms = agent['tool_ms'] + agent['delegation_ms']
+        lines.append(f"{name[:20]:<20}  {agent['agent_calls']:>5.0f}  {agent['model_calls']:>11.0f}  "
+                     f"{agent['model_ms']:>10.1f}  {tool_calls:>10.0f}  {tool_ms:>10.1f}  "
+                     f"{agent['prompt_tokens']:>10.0f}  {agent['completion_tokens']:>10.0f}  "
+                     f"{agent['tool_result_bytes']:>10.0f}  {agent['retries']:>7.0f}  {agent['errors']:>6.0f}")
+
+    model_spans = [span for span in spans if span['kind'] == 'model']
+    lines += ["", f"Top {top} token hotspots"]
+    lines.append(f"{'prompt':>8}  {'compl':>6}  {'req bytes':>9}  {'ms':>9}  agent / step")
+    for span in sorted(model_spans, key=_tokens, reverse=True)[:top]:
+        lines.append(f"{span.get('prompt_tokens') or 0:>8}  {span.get('completion_tokens') or 0:>6}  "
+                     f"{span.get('request_bytes') or 0:>9}  {span['duration_ms']:>9.1f}  "
+                     f"{span.get('agent') or '-'} ({span.get('messages', '?')} messages, {after(span)})")
+
+    tool_spans = [span for span in spans if span['kind'] in ('tool', 'delegation')]
+    if tool_spans:
+        lines += ["", "Largest tool results (fed back to the model as prompt tokens)"]
+        for span in sorted(tool_spans, key=lambda s: s.get('response_bytes') or 0, reverse=True)[:top]:
+            lines.append(f"{span.get('response_bytes') or 0:>10} B  {span['duration_ms']:>9.1f} ms  {label(span)}")
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize agent trace spans")
+    parser.add_argument("trace_file", nargs="?", default=os.getenv("AGENT_TRACE_FILE", "agent_traces.jsonl"))
+    parser.add_argument("--top", type=int, default=10, help="Rows per table")
+    args = parser.parse_args()
+    print(summarize(load_spans(args.trace_file), args.top))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,546 @@
+"""
+Offline end-to-end benchmarks for the agents.
+
+Every scenario runs in a fresh process against local stub servers (see
+stub_servers.py), drives the real agent code under a configurable
+concurrency and reports throughput, latency percentiles and peak RSS.
+Results can be saved as a baseline and later runs are compared against it.
+
+    python benchmark.py                          # run all scenarios
+    python benchmark.py weather_v2 gmail_fetch -n 200 -c 8 --latency 50
+    python benchmark.py --record weather_v2      # capture real responses once
+    python benchmark.py --record gmail_fetch     # download GMAIL_EMAIL's inbox as .eml files
+    python benchmark.py --save-baseline          # store results for regression checks
+"""
+import argparse
+import contextlib
+import importlib.util
+import json
+import logging
+import multiprocessing
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+import stub_servers
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BENCH_DIR = os.path.join(ROOT, "benchmarks")
+CASSETTE_DIR = os.path.join(BENCH_DIR, "cassettes")
+MAILBOX_DIR = os.path.join(BENCH_DIR, "mailbox")
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+
+CITIES = ["london", "paris", "prague", "berlin", "madrid", "rome", "vienna", "oslo"]
+
+UPSTREAMS = {
+    "nominatim": ("https://nominatim.openstreetmap.org", stub_servers.nominatim_response),
+    "open_meteo": ("https://api.open-meteo.com", stub_servers.open_meteo_response),
+    "lm_studio": ("http://localhost:1234", stub_servers.chat_completion_response),
+    "groq": ("https://api.groq.com", stub_servers.chat_completion_response),
+}
+
+# A scenario setup registers its stubs on the exit stack and returns operation(i),
+# which performs one request; an optional operation.metrics() adds extra results
+# and operation.max_concurrency caps the number of concurrent callers
+Setup = Callable[[Dict[str, Any], contextlib.ExitStack], Callable[[int], Any]]
+SCENARIOS: Dict[str, Setup] = {}
+
+
+def scenario(name: str):
+    def register(setup: Setup) -> Setup:
+        SCENARIOS[name] = setup
+        return setup
+    return register
+
+
+def load_script(filename: str, module_name: str):
+    """Import one of the repo scripts whose file name is not a valid module name"""
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(ROOT, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def http_stub(name: str, options: Dict[str, Any], stack: contextlib.ExitStack) -> stub_servers.HTTPStubServer:
+    upstream, default = UPSTREAMS[name]
+    stub = stub_servers.HTTPStubServer(
+        cassette=stub_servers.Cassette(os.path.join(CASSETTE_DIR, f"{name}.json")),
+        upstream=upstream,
+        record=options["record"],
+        default=default,
+        latency=options["latency"],
+        jitter=options["jitter"],
+    )
+    return stack.enter_context(stub)
+
+
+def per_thread(factory: Callable[[], Any]) -> Callable[[], Any]:
+    """Lazily build one instance per worker thread for objects that are not thread-safe"""
+    local = threading.local()
+
+    def get():
+        if not hasattr(local, "instance"):
+            local.instance = factory()
+        return local.instance
+    return get
+
+
+def use_groq_stub(options: Dict[str, Any], stack: contextlib.ExitStack) -> None:
+    groq = http_stub("groq", options, stack)
+    os.environ["GROQ_BASE_URL"] = groq.url
+    os.environ.setdefault("GROQ_API_KEY", "stub-key")
+
+
+@scenario("weather_v2")
+def weather_v2(options, stack):
+    os.environ["NOMINATIM_URL"] = http_stub("nominatim", options, stack).url + "/search"
+    os.environ["OPEN_METEO_URL"] = http_stub("open_meteo", options, stack).url + "/v1/forecast"
+    os.environ["LM_STUDIO_API_URL"] = http_stub("lm_studio", options, stack).url + "/v1/chat/completions"
+    import weather_agent_v2
+    agent = per_thread(weather_agent_v2.WeatherAgent)
+    return lambda i: agent().query_weather(CITIES[i % len(CITIES)])
+
+
+@scenario("weather_cached")
+def weather_cached(options, stack):
+    """Skewed city popularity through the stale-while-revalidate cache with short TTLs"""
+    os.environ["NOMINATIM_URL"] = http_stub("nominatim", options, stack).url + "/search"
+    os.environ["OPEN_METEO_URL"] = http_stub("open_meteo", options, stack).url + "/v1/forecast"
+    os.environ["LM_STUDIO_API_URL"] = http_stub("lm_studio", options, stack).url + "/v1/chat/completions"
+    import weather_agent_v2
+    from weather_cache import WeatherCache
+    agent = per_thread(weather_agent_v2.WeatherAgent)
+    cache = WeatherCache(lambda city: agent().query_weather(city), ttl=2, refresh_ahead=1,
+                         refreshes_per_minute=600, hot_cities=4)
+    stack.callback(cache.stop)
+    cache.start(interval=0.2)
+    rng = random.Random(0)
+
+    def operation(i):
+        # Pace callers so entries expire during the run; latencies include these 10 ms
+        time.sleep(0.01)
+        return cache.get(CITIES[min(int(rng.expovariate(0.8)), len(CITIES) - 1)])
+
+    operation.metrics = lambda: {k: float(v) for k, v in cache.stats.items()}
+    return operation
+
+
+@scenario("weather_service")
+def weather_service(options, stack):
+    """Bursts of identical /weather requests against the HTTP service with single-flight"""
+    import urllib.request
+    os.environ["NOMINATIM_URL"] = http_stub("nominatim", options, stack).url + "/search"
+    os.environ["OPEN_METEO_URL"] = http_stub("open_meteo", options, stack).url + "/v1/forecast"
+    os.environ["LM_STUDIO_API_URL"] = http_stub("lm_studio", options, stack).url + "/v1/chat/completions"
+    import weather_agent_v2
+    from weather_service import WeatherHTTPServer, WeatherService, make_handler
+
+    service = WeatherService(weather_agent_v2.WeatherAgent, workers=4)
+    stack.callback(service.close)
+    server = WeatherHTTPServer(("127.0.0.1", 0), make_handler(service))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    stack.callback(server.server_close)
+    stack.callback(server.shutdown)
+    base = f"http://127.0.0.1:{server.server_address[1]}/weather?city="
+
+    def operation(i):
+        with urllib.request.urlopen(base + CITIES[(i // 100) % len(CITIES)], timeout=60) as response:
+            return json.loads(response.read())
+
+    operation.metrics = lambda: {
+        "upstream_queries": float(service.counters["upstream_queries_total"]),
+        "coalesced": float(service.flight.coalesced),
+    }
+    return operation
+
+
+@scenario("prompt_prefix")
+def prompt_prefix(options, stack):
+    """query_weather against an LM Studio stub that simulates prompt prefix caching"""
+    os.environ["NOMINATIM_URL"] = http_stub("nominatim", options, stack).url + "/search"
+    os.environ["OPEN_METEO_URL"] = http_stub("open_meteo", options, stack).url + "/v1/forecast"
+    completions = stub_servers.PrefixCachingCompletions()
+    lm_studio = stack.enter_context(stub_servers.HTTPStubServer(
+        default=completions, latency=options["latency"], jitter=options["jitter"]))
+    os.environ["LM_STUDIO_API_URL"] = lm_studio.url + "/v1/chat/completions"
+    import weather_agent_v2
+
+    def query(city):
+        return weather_agent_v2.WeatherAgent().query_weather(city)
+
+    def operation(i):
+        return query(CITIES[i % len(CITIES)])
+
+    def prompt_ms(city, clear_cache):
+        """Prompt processing time of one query, summed over its completion requests"""
+        with completions.lock:
+            if clear_cache:
+                completions.cache.clear()
+            completions.prompt_ms.clear()
+        query(city)
+        return sum(ms for ms, _, _ in completions.prompt_ms)
+
+    def metrics():
+        # Cached share over the measured run, before the passes below reset it
+        total_tokens = sum(tokens for _, tokens, _ in completions.prompt_ms) or 1
+        cached_token_pct = 100 * sum(cached for _, _, cached in completions.prompt_ms) / total_tokens
+        # Cold: every query starts from an empty cache. Warm: the same queries
+        # after a different city has cached the shared prefix, so only the
+        # common template is reused and never an identical prompt
+        cold = [prompt_ms(city, clear_cache=True) for city in CITIES]
+        prompt_ms("lisbon", clear_cache=True)
+        warm = [prompt_ms(city, clear_cache=False) for city in CITIES]
+        return {
+            "cold_prompt_ms": sum(cold) / len(cold),
+            "warm_prompt_ms": sum(warm) / len(warm),
+            "prompt_samples": float(len(CITIES)),
+            "cached_token_pct": cached_token_pct,
+        }
+
+    operation.metrics = metrics
+    return operation
+
+
+@scenario("weather_v3")
+def weather_v3(options, stack):
+    os.environ["NOMINATIM_URL"] = http_stub("nominatim", options, stack).url + "/search"
+    os.environ["OPEN_METEO_URL"] = http_stub("open_meteo", options, stack).url + "/v1/forecast"
+    use_groq_stub(options, stack)
+    module = load_script("weather_agent-v3.py", "weather_agent_v3")
+    agent = per_thread(module.WeatherAgent)
+    return lambda i: agent().query_weather(CITIES[i % len(CITIES)])
+
+
+def record_mailbox(options) -> None:
+    """Capture the real inbox of GMAIL_EMAIL into MAILBOX_DIR for later replays"""
+    from dotenv import load_dotenv
+    load_dotenv()
+    address, password = os.environ.get("GMAIL_EMAIL"), os.environ.get("GMAIL_PASSWORD")
+    if not address or not password:
+        raise RuntimeError("Recording the mailbox needs GMAIL_EMAIL and GMAIL_PASSWORD")
+    count = stub_servers.record_mailbox(
+        MAILBOX_DIR, address, password, os.environ.get("SEARCH_ADDRESS", "").strip(),
+        max_emails=options["mailbox_size"], host=os.environ.get("IMAP_HOST", "imap.gmail.com"),
+        port=int(os.environ["IMAP_PORT"]) if os.environ.get("IMAP_PORT") else None,
+        ssl=os.environ.get("IMAP_SSL", "1") == "1",
+    )
+    print(f"Recorded {count} messages into {MAILBOX_DIR}", file=sys.stderr)
+
+
+@scenario("gmail_fetch")
+def gmail_fetch(options, stack):
+    if options["record"]:
+        record_mailbox(options)
+    messages = stub_servers.load_mailbox(MAILBOX_DIR) or stub_servers.synthetic_mailbox(options["mailbox_size"])
+    imap = stack.enter_context(stub_servers.IMAPStubServer(messages, options["latency"], options["jitter"]))
+    os.environ.update({"IMAP_HOST": imap.host, "IMAP_PORT": str(imap.port), "IMAP_SSL": "0"})
+    import gmail_reader
+    return lambda i: gmail_reader.fetch_emails_from_sender("bench@example.com", "stub", "", max_emails=50,
+                                                           workers=options["parse_workers"])
+
+
+@scenario("mime_parse")
+def mime_parse(options, stack):
+    """Parse the whole local corpus per request; metrics show scaling with parser processes"""
+    import gmail_reader
+    messages = stub_servers.load_mailbox(MAILBOX_DIR) or stub_servers.synthetic_mailbox(options["mailbox_size"])
+
+    def operation(i):
+        return list(gmail_reader.parse_in_order(messages, options["parse_workers"]))
+
+    def metrics():
+        scaling = {}
+        workers = 1
+        while workers <= (os.cpu_count() or 1):
+            started = time.perf_counter()
+            list(gmail_reader.parse_in_order(messages, workers))
+            scaling[f"msgs_per_sec_{workers}w"] = len(messages) / (time.perf_counter() - started)
+            workers *= 2
+        return scaling
+
+    operation.metrics = metrics
+    return operation
+
+
+@scenario("send_email")
+def send_email(options, stack):
+    smtp = stack.enter_context(stub_servers.SMTPStubServer(options["latency"], options["jitter"]))
+    os.environ.update({
+        "SMTP_HOST": smtp.host, "SMTP_PORT": str(smtp.port), "SMTP_STARTTLS": "0",
+        "EMAIL_HOST": smtp.host, "EMAIL_USER": "bench@example.com", "EMAIL_PASSWORD": "stub",
+    })
+    import email_sender
+    body = "<p>" + "Current stock prices. " * 50 + "</p>"
+    return lambda i: email_sender.send_email(f"user{i}@example.com", "Benchmark", body)
+
+
+@scenario("price_alerts")
+def price_alerts(options, stack):
+    """One alert engine tick per request over a synthetic 1M rule watchlist"""
+    import numpy as np
+    from price_alerts import RULE_TYPES, AlertEngine, Watchlist
+
+    rng = np.random.default_rng(0)
+    n_rules, n_users, n_symbols = options["alert_rules"], max(1, options["alert_rules"] // 10), 500
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    base = rng.uniform(10, 500, n_symbols)
+    symbol_idx = rng.integers(0, n_symbols, n_rules, dtype=np.int32)
+    watchlist = Watchlist(
+        [f"user{i}@example.com" for i in range(n_users)], symbols,
+        rng.integers(0, n_users, n_rules, dtype=np.int32), symbol_idx,
+        rng.integers(0, len(RULE_TYPES), n_rules, dtype=np.int8),
+        np.where(rng.random(n_rules) < 0.5, base[symbol_idx] * rng.uniform(0.9, 1.1, n_rules), rng.uniform(1, 10, n_rules)),
+    )
+    prices = base.copy()
+
+    def fetch(_symbols):
+        prices[:] *= rng.normal(1, 0.005, n_symbols)
+        return prices.copy()
+
+    sent = [0]
+
+    def send(to_email, subject, body):
+        sent[0] += 1
+        return f"Email sent successfully to {to_email}."
+
+    engine = AlertEngine(watchlist, fetch=fetch, send=send)
+    evaluations = []
+
+    def operation(i):
+        result = engine.tick(now=float(i))
+        evaluations.append(engine.last_eval_seconds)
+        return result
+
+    # One engine, one shared RNG: ticks are sequential by nature
+    operation.max_concurrency = 1
+    operation.metrics = lambda: {
+        "rules": float(n_rules),
+        "rule_evals_per_sec": n_rules * len(evaluations) / (sum(evaluations) or 1),
+        "emails": float(sent[0]),
+    }
+    return operation
+
+
+@scenario("finance_agent")
+def finance_agent(options, stack):
+    use_groq_stub(options, stack)
+    agent = per_thread(lambda: load_script("2_simple_finance_agent.py", "simple_finance_agent").agent_instance)
+    return lambda i: agent().run("Summerize and compare analyst recommendations and fundamentals for TSLA and AAPL.")
+
+
+@scenario("team_agent")
+def team_agent(options, stack):
+    use_groq_stub(options, stack)
+    agent = per_thread(lambda: load_script("4_agent_teams.py", "agent_teams").agent_team_lead)
+    return lambda i: agent().run("Summerize analyst recommendations and stock price then share the latest news for NVDA.")
+
+
+STANDARD_METRICS = ("requests", "concurrency", "errors", "throughput", "p50_ms", "p95_ms", "p99_ms", "peak_rss_mb")
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def run_scenario(name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run one scenario in the current process and return its measurements"""
+    logging.disable(logging.CRITICAL)
+    sys.path.insert(0, ROOT)
+    # Agents write summaries into the working directory
+    os.chdir(tempfile.mkdtemp(prefix=f"bench-{name}-"))
+    requests_count = 1 if options["record"] else options["requests"]
+    concurrency = 1 if options["record"] else options["concurrency"]
+
+    with contextlib.ExitStack() as stack, open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        operation = SCENARIOS[name](options, stack)
+        concurrency = min(concurrency, getattr(operation, "max_concurrency", concurrency))
+        for i in range(0 if options["record"] else options["warmup"]):
+            operation(i)
+
+        latencies: List[float] = []
+
+        def timed(i: int) -> bool:
+            """Run one request; True if it failed"""
+            start = time.perf_counter()
+            try:
+                result = operation(i)
+                failed = isinstance(result, dict) and "error" in result
+            except Exception:
+                failed = True
+            latencies.append(time.perf_counter() - start)
+            return failed
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            errors = sum(pool.map(timed, range(requests_count)))
+        elapsed = time.perf_counter() - started
+        extra = operation.metrics() if hasattr(operation, "metrics") else {}
+
+    latencies.sort()
+    # ru_maxrss is KiB on Linux, bytes on macOS. RUSAGE_CHILDREN reports the
+    # largest finished child (e.g. one parser pool worker), so adding it gives a
+    # lower bound for multi-worker pools that still tracks growth in the workers
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    self_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+    children_rss_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale
+    return {
+        "requests": requests_count,
+        "concurrency": concurrency,
+        "errors": errors,
+        "throughput": requests_count / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_rss_mb": self_rss_mb + children_rss_mb,
+        **({"children_peak_rss_mb": children_rss_mb} if children_rss_mb else {}),
+        **extra,
+    }
+
+
+def _run_child(name: str, options: Dict[str, Any], connection) -> None:
+    try:
+        connection.send(("ok", run_scenario(name, options)))
+    except Exception as e:
+        connection.send(("error", f"{type(e).__name__}: {e}"))
+    finally:
+        connection.close()
+
+
+def run_isolated(name: str, options: Dict[str, Any]) -> Dict[str, Any]:
+    """Run a scenario in a fresh interpreter so peak RSS is per scenario"""
+    context = multiprocessing.get_context("spawn")
+    receiver, sender = context.Pipe(duplex=False)
+    # A plain (non-daemon) process, so scenarios may start their own process pools
+    process = context.Process(target=_run_child, args=(name, options, sender))
+    process.start()
+    sender.close()
+    try:
+        status, result = receiver.recv()
+    except EOFError:
+        raise RuntimeError(f"scenario process exited with code {process.join() or process.exitcode}")
+    process.join()
+    if status != "ok":
+        raise RuntimeError(result)
+    return result
+
+
+def compare(results: Dict[str, Dict[str, Any]], baseline: Dict[str, Dict[str, Any]],
+            tolerance: float) -> List[Tuple[str, str, float, float]]:
+    """List (scenario, metric, baseline, current) for metrics worse than baseline by more than tolerance"""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in ("p50_ms", "p95_ms", "p99_ms", "peak_rss_mb"):
+            if base.get(metric) and current[metric] > base[metric] * (1 + tolerance):
+                regressions.append((name, metric, base[metric], current[metric]))
+        if base.get("throughput") and current["throughput"] < base["throughput"] * (1 - tolerance):
+            regressions.append((name, "throughput", base["throughput"], current["throughput"]))
+    return regressions
+
+
+def print_results(results: Dict[str, Dict[str, Any]]) -> None:
+    header = f"{'scenario':<16}{'req':>6}{'conc':>6}{'err':>5}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'RSS MB':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, r in results.items():
+        print(f"{name:<16}{r['requests']:>6}{r['concurrency']:>6}{r['errors']:>5}{r['throughput']:>10.1f}"
+              f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['peak_rss_mb']:>9.1f}")
+    for name, r in results.items():
+        extra = {k: v for k, v in r.items() if k not in STANDARD_METRICS}
+        if extra:
+            print(f"{name}: " + ", ".join(f"{k}={v:.1f}" for k, v in extra.items()))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline agent benchmarks against local stub servers")
+    parser.add_argument("scenarios", nargs="*", help=f"Scenarios to run (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument("-n", "--requests", type=int, default=50, help="Measured requests per scenario")
+    parser.add_argument("-c", "--concurrency", type=int, default=4, help="Concurrent callers")
+    parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests before timing")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated upstream latency in ms")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Uniform latency jitter in ms")
+    parser.add_argument("--alert-rules", type=int, default=1_000_000, help="Rules in the price_alerts watchlist")
+    parser.add_argument("--parse-workers", type=int, default=0, help="gmail_reader parser processes")
+    parser.add_argument("--mailbox-size", type=int, default=200, help="Synthetic messages when no .eml corpus is recorded")
+    parser.add_argument("--record", action="store_true", help="Proxy to the real services once and save cassettes "
+                        "(gmail_fetch: download the GMAIL_EMAIL inbox into benchmarks/mailbox)")
+    parser.add_argument("--save-baseline", action="store_true", help="Store these results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative regression vs baseline")
+    parser.add_argument("--json", help="Also write results to this file")
+    args = parser.parse_args()
+
+    names = args.scenarios or list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(unknown)}")
+
+    options = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "warmup": args.warmup,
+        "latency": args.latency / 1000,
+        "jitter": args.jitter / 1000,
+        "mailbox_size": args.mailbox_size,
+        "parse_workers": args.parse_workers,
+        "alert_rules": args.alert_rules,
+        "record": args.record,
+    }
+
+    results = {}
+    failed = []
+    for name in names:
+        print(f"Running {name}...", file=sys.stderr)
+        try:
+            results[name] = run_isolated(name, options)
+        except Exception as e:
+            print(f"Scenario {name} failed: {e}", file=sys.stderr)
+            failed.append(name)
+
+    if args.record:
+        print(f"Recorded cassettes into {CASSETTE_DIR}")
+        if failed:
+            sys.exit(1)
+        return
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    baseline = {}
+    if os.path.exists(BASELINE_PATH):
+        with open(BASELINE_PATH) as f:
+            baseline = json.load(f)
+    if args.save_baseline:
+        baseline.update(results)
+        os.makedirs(BENCH_DIR, exist_ok=True)
+        with open(BASELINE_PATH, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"Baseline saved to {BASELINE_PATH}")
+        regressions = []
+    else:
+        regressions = compare(results, baseline, args.tolerance)
+        for name, metric, base, current in regressions:
+            print(f"REGRESSION {name} {metric}: {base:.1f} -> {current:.1f}")
+
+    # A scenario that crashed has no numbers to regress; it must still fail the run
+    for name in failed:
+        note = " (has a baseline)" if name in baseline else ""
+        print(f"FAILED {name}: scenario did not produce results{note}")
+    if regressions or failed:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from dotenv import load_dotenv
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS emails (
+    id INTEGER PRIMARY KEY,
+    fingerprint TEXT UNIQUE NOT NULL,
+    sender TEXT,
+    recipient TEXT,
+    subject TEXT,
+    date TEXT,
+    timestamp REAL,
+    text_content TEXT,
+    attachments TEXT
+);
+CREATE INDEX IF NOT EXISTS emails_timestamp ON emails (timestamp);
+CREATE VIRTUAL TABLE IF NOT EXISTS emails_fts USING fts5 (
+    sender, recipient, subject, text_content,
+    content='emails', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+"""
+
+# Maps query filter names to the FTS5 columns they restrict
+FIELD_COLUMNS = {
+    "sender": "sender",
+    "recipient": "recipient",
+    "subject": "subject",
+    "body": "text_content",
+}
+
+
+def parse_timestamp(value):
+    """Convert an email Date header, ISO string or datetime to a UTC epoch"""
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(value)
+        except ValueError:
+            try:
+                parsed = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def fingerprint(email_obj):
+    """Stable identity of an email record, used to skip duplicates on re-harvest"""
+    key = "\x00".join(
+        email_obj.get(field) or ""
+        for field in ("from", "to", "subject", "date", "textContent")
+    )
+    return hashlib.sha1(key.encode("utf-8", "surrogatepass")).hexdigest()
+
+
+def read_body(path):
+    """Text content stored separately by gmail_reader's BODY_DIR export"""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return ""
+
+
+def quote_phrase(value):
+    """Quote a user supplied value as a single FTS5 phrase"""
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def text_query(text):
+    """
+    Turn free text into an FTS5 query that cannot be a syntax error: every
+    whitespace separated word is quoted as a phrase and any of them may match,
+    with bm25 ranking emails that contain more (and rarer) words first
+    """
+    words = [quote_phrase(word) for word in str(text).split() if re.search(r"\w", word)]
+    return " OR ".join(words) or None
+
+
+class EmailIndex:
+    """
+    Local full-text index over the email records produced by gmail_reader
+
+    Records are stored once in a regular table and indexed by an SQLite FTS5
+    table (delta/varint compressed postings), so repeated searches are
+    answered locally instead of with a new IMAP SEARCH and re-download.
+    """
+
+    def __init__(self, db_path="emails.db"):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def add_emails(self, emails):
+        """
+        Incrementally add email records to the index
+
+        Args:
+            emails (iterable): Dicts with from/to/subject/date/textContent keys, or EmailRecords.
+                Records exported with BODY_DIR have an empty textContent; their body is
+                read from textPath so it is indexed and fingerprinted
+
+        Returns:
+            int: Number of records that were not already indexed
+        """
+        added = 0
+        with self.conn:
+            for email_obj in emails:
+                if not isinstance(email_obj, dict):
+                    email_obj = email_obj.to_dict()
+                if not email_obj.get("textContent") and email_obj.get("textPath"):
+                    email_obj = dict(email_obj, textContent=read_body(email_obj["textPath"]))
+                cursor = self.conn.execute(
+                    "INSERT OR IGNORE INTO emails (fingerprint, sender, recipient, subject, date, "
+                    "timestamp, text_content, attachments) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        fingerprint(email_obj),
+                        email_obj.get("from", ""),
+                        email_obj.get("to", ""),
+                        email_obj.get("subject", ""),
+                        email_obj.get("date", ""),
+                        parse_timestamp(email_obj.get("date")),
+                        email_obj.get("textContent", ""),
+                        json.dumps(email_obj.get("attachments", [])),
+                    ),
+                )
+                if cursor.rowcount:
+                    self.conn.execute(
+                        "INSERT INTO emails_fts (rowid, sender, recipient, subject, text_content) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        (
+                            cursor.lastrowid,
+                            email_obj.get("from", ""),
+                            email_obj.get("to", ""),
+                            email_obj.get("subject", ""),
+                            email_obj.get("textContent", ""),
+                        ),
+                    )
+                    added += 1
+        return added
+
+    def optimize(self):
+        """Merge FTS segments after large backfills"""
+        with self.conn:
+            self.conn.execute("INSERT INTO emails_fts (emails_fts) VALUES ('optimize')")
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM emails").fetchone()[0]
+
+    def search(self, query=None, sender=None, recipient=None, subject=None, body=None,
+               since=None, until=None, limit=20):
+        """
+        Search indexed emails
+
+        Args:
+            query (str): FTS5 query over all fields (e.g. 'invoice AND "due date"')
+            sender (str): Restrict to emails whose From matches this phrase
+            recipient (str): Restrict to emails whose To matches this phrase
+            subject (str): Restrict to emails whose Subject matches this phrase
+            body (str): Restrict to emails whose text content matches this phrase
+            since (str|datetime): Only emails dated at or after this moment
+            until (str|datetime): Only emails dated before this moment
+            limit (int): Maximum number of results
+
+        Returns:
+            list: Matching emails in the gmail_reader record format, best match first
+
+        Raises:
+            ValueError: If since or until is given but is not a recognizable date
+        """
+        match_terms = []
+        if query:
+            match_terms.append(f"({query})")
+        filters = {"sender": sender, "recipient": recipient, "subject": subject, "body": body}
+        for name, value in filters.items():
+            if value:
+                match_terms.append(f"{FIELD_COLUMNS[name]} : {quote_phrase(value)}")
+
+        conditions = []
+        params = []
+        since_ts = parse_timestamp(since)
+        until_ts = parse_timestamp(until)
+        for name, value, ts in (("since", since, since_ts), ("until", until, until_ts)):
+            if value not in (None, "") and ts is None:
+                raise ValueError(f"invalid date for {name}: {value!r} (expected an ISO date like 2024-01-31)")
+        if since_ts is not None:
+            conditions.append("e.timestamp >= ?")
+            params.append(since_ts)
+        if until_ts is not None:
+            conditions.append("e.timestamp < ?")
+            params.append(until_ts)
+
+        if match_terms:
+            sql = (
+                "SELECT e.* FROM emails_fts JOIN emails e ON e.id = emails_fts.rowid "
+                "WHERE emails_fts MATCH ?"
+            )
+            params.insert(0, " AND ".join(match_terms))
+            order = "ORDER BY emails_fts.rank"
+        else:
+            sql = "SELECT e.* FROM emails e WHERE 1"
+            order = "ORDER BY e.timestamp DESC"
+        for condition in conditions:
+            sql += f" AND {condition}"
+        sql += f" {order} LIMIT ?"
+        params.append(limit)
+
+        return [self._row_to_email(row) for row in self.conn.execute(sql, params)]
+
+    @staticmethod
+    def _row_to_email(row):
+        return {
+            "from": row["sender"],
+            "to": row["recipient"],
+            "subject": row["subject"],
+            "date": row["date"],
+            "textContent": row["text_content"],
+            "attachments": json.loads(row["attachments"] or "[]"),
+        }
+
+
+def search_emails(query: str, sender: str = "", since: str = "", until: str = "", limit: int = 10,
+                  raw_query: bool = False) -> str:
+    """Search the local email index.
+
+    Args:
+        query (str): Words to look for in sender, recipient, subject and body.
+        sender (str): Optional sender address or name to filter on.
+        since (str): Optional ISO date; only emails on or after this date.
+        until (str): Optional ISO date; only emails before this date.
+        limit (int): Maximum number of emails to return.
+        raw_query (bool): Treat query as SQLite FTS5 syntax (AND/OR/NEAR, "phrases") instead of plain words.
+
+    Returns:
+        str: JSON list of matching emails, or an error object.
+    """
+    load_dotenv()
+    if query and not raw_query:
+        query = text_query(query)
+    try:
+        with EmailIndex(os.environ.get("EMAIL_INDEX_DB", "emails.db")) as index:
+            results = index.search(query or None, sender=sender or None,
+                                   since=since or None, until=until or None, limit=limit)
+    except ValueError as e:
+        return json.dumps({"error": str(e)})
+    except sqlite3.OperationalError as e:
+        return json.dumps({"error": f"Email search failed: {e}"})
+    return json.dumps(results, indent=2)
+
+
+def main():
+    """Query the local email index from the command line"""
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Search the local email index")
+    parser.add_argument("query", nargs="?", help="FTS5 query over all fields")
+    parser.add_argument("--db", default=os.environ.get("EMAIL_INDEX_DB", "emails.db"))
+    parser.add_argument("--from", dest="sender")
+    parser.add_argument("--to", dest="recipient")
+    parser.add_argument("--subject")
+    parser.add_argument("--since")
+    parser.add_argument("--until")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--load", help="JSON file of gmail_reader records to add first")
+    args = parser.parse_args()
+
+    with EmailIndex(args.db) as index:
+        if args.load:
+            with open(args.load) as f:
+                print(f"Indexed {index.add_emails(json.load(f))} new emails")
+        try:
+            results = index.search(args.query, sender=args.sender, recipient=args.recipient,
+                                   subject=args.subject, since=args.since, until=args.until,
+                                   limit=args.limit)
+        except ValueError as e:
+            parser.error(str(e))
+        print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
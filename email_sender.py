@@ -0,0 +1,53 @@
+import os
+import smtplib
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Email configuration (load from environment variables)
+EMAIL_HOST = os.getenv("EMAIL_HOST")  # e.g., "smtp.gmail.com"
+EMAIL_PORT = int(os.getenv("EMAIL_PORT", 587))  # e.g., 587 for TLS
+EMAIL_USER = os.getenv("EMAIL_USER")  # Your email address
+EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD")  # Your email password or app-specific password
+
+# SMTP relay actually used for sending, overridable to point at a local stub
+SMTP_HOST = os.getenv("SMTP_HOST", "sandbox.smtp.mailtrap.io")
+SMTP_PORT = int(os.getenv("SMTP_PORT", 2525))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
+
+
+def send_email(to_email: str, subject: str, body: str) -> str:
+    """Send an email with the provided subject and body.
+
+    Args:
+        to_email (str): The recipient's email address.
+        subject (str): The subject of the email.
+        body (str): body of the message.
+
+    Returns:
+        str: A message indicating success or failure.
+    """
+    if not all([EMAIL_HOST, EMAIL_PORT, EMAIL_USER, EMAIL_PASSWORD]):
+        return "Email configuration is incomplete. Please check environment variables."
+
+    try:
+        # Create the email
+        msg = MIMEMultipart()
+        msg["From"] = EMAIL_USER
+        msg["To"] = to_email
+        msg["Subject"] = subject
+        msg.attach(MIMEText(body, "html"))
+
+        # Send the email
+        with smtplib.SMTP(SMTP_HOST, SMTP_PORT) as server:
+            if SMTP_STARTTLS:
+                server.starttls()  # Upgrade the connection to secure
+            server.login(EMAIL_USER, EMAIL_PASSWORD)
+            server.sendmail(EMAIL_USER, to_email, msg.as_string())
+
+        return f"Email sent successfully to {to_email}."
+    except Exception as e:
+        return f"Failed to send email: {str(e)}"
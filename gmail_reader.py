@@ -1,7 +1,18 @@
 import imaplib
 import email
+import glob
+import hashlib
 import json
 import os
+import queue
+import sys
+import textwrap
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from typing import Optional
 from dotenv import load_dotenv
 from email.header import decode_header
 
@@ -68,113 +79,291 @@ def get_attachments(message):
                     
     return attachments
 
-def fetch_emails_from_sender(email_address, password, search_address, max_emails=10):
+@dataclass(slots=True)
+class EmailRecord:
+    """Parsed email without a per-instance __dict__, for large mailbox exports"""
+    sender: str
+    recipient: str
+    subject: str
+    date: str
+    text_content: str
+    attachments: list = field(default_factory=list)
+    text_path: Optional[str] = None
+
+    def to_dict(self):
+        """The JSON shape gmail_reader has always produced"""
+        email_obj = {
+            "from": self.sender,
+            "to": self.recipient,
+            "subject": self.subject,
+            "date": self.date,
+            "textContent": self.text_content,
+            "attachments": self.attachments
+        }
+        if self.text_path:
+            email_obj["textPath"] = self.text_path
+        return email_obj
+
+def parse_email(raw_email, max_body_chars=None):
+    """Parse raw RFC822 bytes into an EmailRecord (runs in parser processes)"""
+    message = email.message_from_bytes(raw_email)
+    text_content = get_email_content(message)
+    if max_body_chars is not None:
+        text_content = text_content[:max_body_chars]
+    return EmailRecord(
+        sender=decode_str(message["From"]),
+        recipient=decode_str(message["To"]),
+        subject=decode_str(message["Subject"]),
+        date=decode_str(message["Date"]),
+        text_content=text_content,
+        attachments=get_attachments(message)
+    )
+
+def _parse_keyed_email(item, max_body_chars=None):
+    """Parse an (email_id, raw_email) pair into (content digest, EmailRecord)
+
+    The digest names body files: IMAP sequence numbers shift whenever messages
+    are expunged, so they would make later runs overwrite unrelated bodies.
     """
-    Fetch emails from a specific sender in Gmail inbox
+    _, raw_email = item
+    return hashlib.sha1(raw_email).hexdigest(), parse_email(raw_email, max_body_chars)
+
+def parse_in_order(raw_emails, workers, max_in_flight=None, parse=parse_email):
+    """
+    Parse raw messages in a process pool, yielding results in input order
+    
+    Args:
+        raw_emails (iterable): Raw RFC822 message bytes
+        workers (int): Parser processes; 0 or 1 parses inline
+        max_in_flight (int): Messages submitted but not yet yielded (default 4 per worker)
+        parse (callable): Picklable parse function applied to each item
+        
+    Yields:
+        EmailRecord: Parsed emails
+    """
+    if workers <= 1:
+        for raw_email in raw_emails:
+            yield parse(raw_email)
+        return
+    
+    max_in_flight = max_in_flight or workers * 4
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for raw_email in raw_emails:
+            pending.append(pool.submit(parse, raw_email))
+            if len(pending) >= max_in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+def parse_eml_directory(directory, workers=0, max_body_chars=None):
+    """Parse every .eml file in a directory, in name order"""
+    def read_files():
+        for path in sorted(glob.glob(os.path.join(directory, "*.eml"))):
+            with open(path, "rb") as f:
+                yield f.read()
+    return list(parse_in_order(read_files(), workers, parse=partial(parse_email, max_body_chars=max_body_chars)))
+
+def _fetch_raw_emails(mail, email_ids, log):
+    """Fetch stage: yield (email_id, raw_email) for every message that could be fetched"""
+    for email_id in email_ids:
+        status, msg_data = mail.fetch(email_id, "(RFC822)")
+        if status != "OK":
+            log(f"Error fetching email ID: {email_id}")
+            continue
+        yield email_id, msg_data[0][1]
+
+def _fetch_in_background(mail, email_ids, log, maxsize, stop):
+    """Run the fetch stage on its own thread, handing messages over through a bounded queue"""
+    raw_queue = queue.Queue(maxsize=maxsize)
+    
+    def run():
+        try:
+            for item in _fetch_raw_emails(mail, email_ids, log):
+                while not stop.is_set():
+                    try:
+                        raw_queue.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+        except Exception as e:
+            log(f"Error fetching emails: {str(e)}")
+        finally:
+            if not stop.is_set():
+                raw_queue.put(None)
+    
+    fetcher = threading.Thread(target=run, daemon=True)
+    fetcher.start()
+    return fetcher, iter(raw_queue.get, None)
+
+def _connect():
+    """Connect to Gmail IMAP server (overridable to point at a local stub)"""
+    imap_host = os.environ.get("IMAP_HOST", "imap.gmail.com")
+    if os.environ.get("IMAP_SSL", "1") == "1":
+        return imaplib.IMAP4_SSL(imap_host, int(os.environ.get("IMAP_PORT", 993)))
+    return imaplib.IMAP4(imap_host, int(os.environ.get("IMAP_PORT", 143)))
+
+def iter_emails_from_sender(email_address, password, search_address, max_emails=10, workers=0,
+                            max_body_chars=None, body_dir=None, verbose=True, log_file=None):
+    """
+    Fetch emails from a specific sender in Gmail inbox, yielding each one as soon as it is parsed
     
     Args:
         email_address (str): Your Gmail address
         password (str): Your Gmail password or app password
         search_address (str): The email address to search for
-        max_emails (int): Maximum number of emails to retrieve
+        max_emails (int): Maximum number of emails to retrieve (None or 0 for all)
+        workers (int): Parser processes for MIME decoding; 0 parses on the
+            fetching thread. With workers, fetching runs on its own thread and
+            hands raw messages to the parsers through a bounded queue.
+        max_body_chars (int): Truncate text content to this many characters
+        body_dir (str): Write text content to <body_dir>/<sha1 of the message>.txt
+            instead of keeping it in the record (the record's text_path points to it)
+        verbose (bool): Print progress (errors are always reported)
+        log_file (file): Where progress and errors go (default stdout), e.g.
+            sys.stderr when the emails themselves are written to stdout
         
-    Returns:
-        list: List of emails in JSON format
+    Yields:
+        EmailRecord: Emails, most recent first
     """
-    print(f"Connecting to Gmail for account: {email_address}")
+    log = partial(print, file=log_file) if verbose else (lambda *args, **kwargs: None)
+    report = partial(print, file=log_file if verbose else sys.stderr)
+    log(f"Connecting to Gmail for account: {email_address}")
     # Debug: Check password string (without revealing full password)
     password_length = len(password) if password else 0
-    print(f"Using password with length: {password_length}")
+    log(f"Using password with length: {password_length}")
     
+    mail = None
+    fetcher = None
+    stop = threading.Event()
     try:
-        # Connect to Gmail IMAP server
-        mail = imaplib.IMAP4_SSL("imap.gmail.com")
+        mail = _connect()
         
         # Login to account
-        print("Attempting login...")
+        log("Attempting login...")
         mail.login(email_address, password)
-        print("Login successful!")
+        log("Login successful!")
         
         # Select inbox
-        print("Selecting inbox...")
+        log("Selecting inbox...")
         mail.select("INBOX")
         
         # Search for all emails from the specified address
-        print(f"Searching for emails from: {search_address}")
+        log(f"Searching for emails from: {search_address}")
         status, messages = mail.search(None, f'FROM "{search_address}"')
         
         if status != "OK":
-            print(f"No messages found from {search_address}")
-            return []
+            log(f"No messages found from {search_address}")
+            return
         
         # Get list of email IDs
         email_ids = messages[0].split()
         email_count = len(email_ids)
-        print(f"Found {email_count} emails from {search_address}")
+        log(f"Found {email_count} emails from {search_address}")
         
         # Limit the number of emails to process
-        if max_emails < len(email_ids):
+        if max_emails and max_emails < len(email_ids):
             email_ids = email_ids[-max_emails:]
-            print(f"Processing only the most recent {max_emails} emails")
+            log(f"Processing only the most recent {max_emails} emails")
+        email_ids = list(reversed(email_ids))
         
-        email_list = []
+        if workers > 1:
+            fetcher, raw_emails = _fetch_in_background(mail, email_ids, report, workers * 4, stop)
+        else:
+            raw_emails = _fetch_raw_emails(mail, email_ids, report)
         
-        # Process each email
-        for i, email_id in enumerate(reversed(email_ids)):
-            print(f"Processing email {i+1}/{len(email_ids)}...")
-            # Fetch the email
-            status, msg_data = mail.fetch(email_id, "(RFC822)")
-            
-            if status != "OK":
-                print(f"Error fetching email ID: {email_id}")
-                continue
-                
-            # Parse the email content
-            raw_email = msg_data[0][1]
-            message = email.message_from_bytes(raw_email)
-            
-            # Extract email details
-            msg_from = decode_str(message["From"])
-            msg_to = decode_str(message["To"])
-            msg_subject = decode_str(message["Subject"])
-            msg_date = decode_str(message["Date"])
-            
-            print(f"Email from: {msg_from}, Subject: {msg_subject}")
-            
-            # Get text content
-            text_content = get_email_content(message)
-            
-            # Get attachments
-            attachments = get_attachments(message)
-            
-            # Create email object
-            email_obj = {
-                "from": msg_from,
-                "to": msg_to,
-                "subject": msg_subject,
-                "date": msg_date,
-                "textContent": text_content,
-                "attachments": attachments
-            }
-            
-            email_list.append(email_obj)
+        if body_dir:
+            os.makedirs(body_dir, exist_ok=True)
+        parse = partial(_parse_keyed_email, max_body_chars=max_body_chars)
+        processed = 0
+        for digest, record in parse_in_order(raw_emails, workers, parse=parse):
+            if body_dir:
+                record.text_path = os.path.join(body_dir, f"{digest}.txt")
+                with open(record.text_path, "w", encoding="utf-8") as f:
+                    f.write(record.text_content)
+                record.text_content = ""
+            processed += 1
+            log(f"Email {processed}/{len(email_ids)} from: {record.sender}, Subject: {record.subject}")
+            yield record
         
-        print(f"Successfully processed {len(email_list)} emails")
-        return email_list
+        log(f"Successfully processed {processed} emails")
         
     except Exception as e:
-        print(f"Error: {str(e)}")
-        return []
+        report(f"Error: {str(e)}")
     
     finally:
+        stop.set()
+        if fetcher is not None:
+            fetcher.join()
         # Close the connection
-        try:
-            print("Closing connection...")
-            mail.close()
-            mail.logout()
-            print("Connection closed")
-        except:
-            print("Error closing connection")
+        if mail is not None:
+            try:
+                log("Closing connection...")
+                mail.close()
+                mail.logout()
+                log("Connection closed")
+            except:
+                report("Error closing connection")
+
+def fetch_emails_from_sender(email_address, password, search_address, max_emails=10, workers=0):
+    """
+    Fetch emails from a specific sender in Gmail inbox
+    
+    Args:
+        email_address (str): Your Gmail address
+        password (str): Your Gmail password or app password
+        search_address (str): The email address to search for
+        max_emails (int): Maximum number of emails to retrieve
+        workers (int): Parser processes for MIME decoding (see iter_emails_from_sender)
+        
+    Returns:
+        list: List of emails in JSON format
+    """
+    return [
+        record.to_dict()
+        for record in iter_emails_from_sender(email_address, password, search_address, max_emails, workers)
+    ]
+
+def _as_dict(record):
+    return record.to_dict() if isinstance(record, EmailRecord) else record
+
+def write_jsonl(records, fp):
+    """Write one JSON object per line as records arrive; returns the count"""
+    count = 0
+    for record in records:
+        fp.write(json.dumps(_as_dict(record), ensure_ascii=False))
+        fp.write("\n")
+        count += 1
+    return count
+
+def write_json_array(records, fp, indent=None):
+    """Write a JSON array incrementally, one record at a time; returns the count"""
+    count = 0
+    fp.write("[")
+    for record in records:
+        text = json.dumps(_as_dict(record), indent=indent, ensure_ascii=False)
+        if indent:
+            text = textwrap.indent(text, " " * indent)
+        fp.write(",\n" if count else "\n")
+        fp.write(text)
+        count += 1
+    fp.write("\n]\n" if count else "]\n")
+    return count
+
+def _index_as_you_go(records, index, batch_size=500):
+    """Pass records through while adding them to the search index in batches"""
+    batch = []
+    added = 0
+    for record in records:
+        batch.append(record)
+        if len(batch) >= batch_size:
+            added += index.add_emails(batch)
+            batch = []
+        yield record
+    added += index.add_emails(batch)
+    print(f"Indexed {added} new emails into {index.db_path}", file=sys.stderr)
 
 def main():
     """Main function to run the script"""
@@ -201,14 +390,43 @@ def main():
     # Get the sender address to search for
     search_address = os.environ.get("SEARCH_ADDRESS", "").strip()
     
-    # Fetch emails
-    emails = fetch_emails_from_sender(your_email, password, search_address)
+    # Export options: OUTPUT_FILE (.jsonl or .json) streams to disk instead of stdout
+    output_file = os.environ.get("OUTPUT_FILE")
+    max_emails = int(os.environ.get("MAX_EMAILS", 10))
+    max_body_chars = int(os.environ.get("MAX_BODY_CHARS", 0)) or None
+    body_dir = os.environ.get("BODY_DIR") or None
     
-    # Print as JSON
-    if emails:
-        print("\nFound emails:")
-        print(json.dumps(emails, indent=2))
-    else:
+    # Fetch emails, optionally decoding them in a pool of parser processes
+    workers = int(os.environ.get("GMAIL_PARSE_WORKERS", 0))
+    records = iter_emails_from_sender(your_email, password, search_address, max_emails, workers,
+                                      max_body_chars, body_dir,
+                                      log_file=None if output_file else sys.stderr)
+    
+    # Add to the local search index if one is configured
+    index_db = os.environ.get("EMAIL_INDEX_DB")
+    index = None
+    if index_db:
+        from email_index import EmailIndex
+        index = EmailIndex(index_db)
+        records = _index_as_you_go(records, index)
+    
+    # Stream as JSON, writing each email as soon as it is parsed
+    try:
+        if output_file:
+            with open(output_file, "w", encoding="utf-8") as f:
+                if output_file.endswith(".jsonl"):
+                    count = write_jsonl(records, f)
+                else:
+                    count = write_json_array(records, f, indent=2)
+            print(f"Wrote {count} emails to {output_file}")
+        else:
+            print("\nFound emails:")
+            count = write_json_array(records, sys.stdout, indent=2)
+    finally:
+        if index is not None:
+            index.close()
+    
+    if not count:
         print("\nNo emails found or error occurred")
 
 if __name__ == "__main__":
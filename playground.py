@@ -5,8 +5,11 @@ from phi.tools.duckduckgo import DuckDuckGo
 from phi.tools.yfinance import YFinanceTools
 from phi.playground import Playground, serve_playground_app
 from dotenv import load_dotenv
+from agent_tracing import enable_tracing
 
 load_dotenv()
+# Writes model/tool call spans to $AGENT_TRACE_FILE when it is set
+enable_tracing()
 
 web_agent = Agent(
     name="Web Agent",
@@ -0,0 +1,266 @@
+import argparse
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+from dotenv import load_dotenv
+
+from email_sender import send_email
+
+logger = logging.getLogger(__name__)
+
+# Rule types; each rule compares its symbol's price against `value`
+RULE_TYPES = ['above', 'below', 'pct_up', 'pct_down', 'cross_up', 'cross_down']
+ABOVE, BELOW, PCT_UP, PCT_DOWN, CROSS_UP, CROSS_DOWN = range(len(RULE_TYPES))
+# --reference-reset choices, in seconds (0 = never)
+REFERENCE_PERIODS = {'hourly': 3600, 'daily': 86400, 'never': 0}
+
+
+def fetch_prices(symbols: Sequence[str]) -> np.ndarray:
+    """Latest price for every symbol with a single batched yfinance download"""
+    import yfinance as yf
+
+    data = yf.download(list(symbols), period='1d', interval='1m', progress=False, group_by='column')
+    if len(data) == 0:
+        return np.full(len(symbols), np.nan)
+    closes = data['Close']
+    if closes.ndim == 1:
+        closes = closes.to_frame(symbols[0])
+    latest = closes.ffill().iloc[-1]
+    return np.array([float(latest.get(symbol, np.nan)) for symbol in symbols], dtype=np.float64)
+
+
+class Watchlist:
+    """
+    All users' alert rules as parallel arrays, one row per rule
+
+    Symbols and users are interned once, so every rule is just a few integers
+    and a float: rule i belongs to users[user_idx[i]] and watches
+    symbols[symbol_idx[i]].
+    """
+
+    def __init__(self, users: List[str], symbols: List[str], user_idx: np.ndarray,
+                 symbol_idx: np.ndarray, rule_type: np.ndarray, value: np.ndarray):
+        self.users = users
+        self.symbols = symbols
+        self.user_idx = user_idx
+        self.symbol_idx = symbol_idx
+        self.rule_type = rule_type
+        self.value = value
+
+    def __len__(self):
+        return len(self.rule_type)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Watchlist':
+        """
+        Build from {"users": [{"email": ..., "rules": [{"symbol": "NVDA", "type": "above", "value": 150}]}]}
+        """
+        users, symbols = [], []
+        symbol_ids: Dict[str, int] = {}
+        user_idx, symbol_idx, rule_type, value = [], [], [], []
+        for user in data.get('users', []):
+            users.append(user['email'])
+            for rule in user.get('rules', []):
+                symbol = rule['symbol'].upper()
+                if symbol not in symbol_ids:
+                    symbol_ids[symbol] = len(symbols)
+                    symbols.append(symbol)
+                if rule['type'] not in RULE_TYPES:
+                    raise ValueError(f"Unknown rule type '{rule['type']}', expected one of {RULE_TYPES}")
+                user_idx.append(len(users) - 1)
+                symbol_idx.append(symbol_ids[symbol])
+                rule_type.append(RULE_TYPES.index(rule['type']))
+                value.append(float(rule['value']))
+        return cls(
+            users, symbols,
+            np.array(user_idx, dtype=np.int32),
+            np.array(symbol_idx, dtype=np.int32),
+            np.array(rule_type, dtype=np.int8),
+            np.array(value, dtype=np.float64),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> 'Watchlist':
+        with open(path) as f:
+            return cls.from_dict(json.load(f))
+
+
+def evaluate_rules(watchlist: Watchlist, prices: np.ndarray, previous: np.ndarray,
+                   reference: np.ndarray) -> np.ndarray:
+    """
+    Evaluate every rule in one vectorized pass
+
+    Args:
+        watchlist (Watchlist): Rules to evaluate
+        prices (np.ndarray): Current price per symbol
+        previous (np.ndarray): Price per symbol at the previous tick (NaN if unknown)
+        reference (np.ndarray): Price per symbol that percent moves are measured from
+
+    Returns:
+        np.ndarray: Boolean mask of rules that fire
+    """
+    current = prices[watchlist.symbol_idx]
+    before = previous[watchlist.symbol_idx]
+    base = reference[watchlist.symbol_idx]
+    value = watchlist.value
+    kind = watchlist.rule_type
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        change_pct = (current - base) / base * 100
+        # NaN prices compare False, so rules on symbols without data never fire
+        return np.select(
+            [kind == ABOVE, kind == BELOW, kind == PCT_UP, kind == PCT_DOWN, kind == CROSS_UP, kind == CROSS_DOWN],
+            [current >= value, current <= value, change_pct >= value, change_pct <= -value,
+             (before < value) & (current >= value), (before > value) & (current <= value)],
+            default=False,
+        )
+
+
+class AlertEngine:
+    """
+    Runs watchlist rules against live prices and emails the users whose rules fire
+
+    Each tick fetches every distinct symbol once, evaluates all rules in one
+    vectorized pass, drops rules still in their cooldown, rate-limits per
+    user and sends one combined email per notified user through send_email.
+
+    Args:
+        watchlist (Watchlist): Rules to evaluate
+        fetch (callable): symbols -> array of current prices
+        send (callable): (to_email, subject, body) -> status string
+        cooldown (float): Seconds before the same rule may notify again
+        max_emails_per_user (int): Emails a user may receive per rate_window
+        rate_window (float): Rate limit window in seconds
+        send_workers (int): Concurrent SMTP sessions used for a batch
+        reference_period (float): pct_up/pct_down measure from the first price seen
+            in each period of this many seconds, aligned to UTC (86400 = since the
+            first tick of the UTC day); 0 keeps the first price ever seen
+    """
+
+    def __init__(self, watchlist: Watchlist, fetch: Callable[[Sequence[str]], np.ndarray] = fetch_prices,
+                 send: Callable[[str, str, str], str] = send_email, cooldown: float = 3600,
+                 max_emails_per_user: int = 5, rate_window: float = 3600, send_workers: int = 4,
+                 reference_period: float = 86400):
+        self.watchlist = watchlist
+        self.fetch = fetch
+        self.send = send
+        self.cooldown = cooldown
+        self.max_emails_per_user = max_emails_per_user
+        self.rate_window = rate_window
+        self.send_workers = send_workers
+        self.reference_period = reference_period
+        self.reference_epoch: Optional[int] = None
+
+        n_symbols = len(watchlist.symbols)
+        n_users = len(watchlist.users)
+        self.previous = np.full(n_symbols, np.nan)
+        self.reference = np.full(n_symbols, np.nan)
+        self.last_fired = np.full(len(watchlist), -np.inf)
+        # Rules whose email failed to send; retried next tick, since a crossing won't fire twice
+        self.pending = np.zeros(len(watchlist), dtype=bool)
+        self.window_start = np.full(n_users, -np.inf)
+        self.window_count = np.zeros(n_users, dtype=np.int32)
+        self.last_eval_seconds = 0.0
+
+    def reset_reference(self) -> None:
+        """Measure percent moves from the next tick's prices (e.g. at market open)"""
+        self.reference[:] = np.nan
+
+    def tick(self, now: Optional[float] = None) -> Dict[str, int]:
+        now = time.time() if now is None else now
+        if self.reference_period > 0:
+            epoch = int(now // self.reference_period)
+            if epoch != self.reference_epoch:
+                self.reference_epoch = epoch
+                self.reset_reference()
+        prices = np.asarray(self.fetch(self.watchlist.symbols), dtype=np.float64)
+        self.reference = np.where(np.isnan(self.reference), prices, self.reference)
+
+        started = time.perf_counter()
+        fired = evaluate_rules(self.watchlist, prices, self.previous, self.reference) | self.pending
+        fired &= (now - self.last_fired) >= self.cooldown
+        self.last_eval_seconds = time.perf_counter() - started
+        self.previous = prices
+
+        user_idx = self.watchlist.user_idx
+        rules = np.flatnonzero(fired)
+        users = self._rate_limit(np.unique(user_idx[rules]), now)
+        rules = rules[np.isin(user_idx[rules], users)]
+
+        # Cooldown and rate limit only count emails that actually went out
+        delivered = self._send_batch(rules, prices)
+        delivered_rules = rules[np.isin(user_idx[rules], delivered)]
+        self.window_count[delivered] += 1
+        self.last_fired[delivered_rules] = now
+        self.pending[:] = False
+        self.pending[np.setdiff1d(rules, delivered_rules, assume_unique=True)] = True
+        return {'rules_fired': int(fired.sum()), 'rules_notified': len(delivered_rules),
+                'users_notified': len(delivered), 'emails_sent': len(delivered),
+                'emails_failed': len(users) - len(delivered)}
+
+    def _rate_limit(self, users: np.ndarray, now: float) -> np.ndarray:
+        """Users still allowed an email in their current window"""
+        expired = users[now - self.window_start[users] >= self.rate_window]
+        self.window_start[expired] = now
+        self.window_count[expired] = 0
+        return users[self.window_count[users] < self.max_emails_per_user]
+
+    def _send_batch(self, rules: np.ndarray, prices: np.ndarray) -> np.ndarray:
+        """Email every user their fired rules; returns the users whose email was sent"""
+        if len(rules) == 0:
+            return np.zeros(0, dtype=np.int32)
+        wl = self.watchlist
+        order = rules[np.argsort(wl.user_idx[rules], kind='stable')]
+        boundaries = np.flatnonzero(np.diff(wl.user_idx[order])) + 1
+        messages = []
+        recipients = []
+        for group in np.split(order, boundaries):
+            lines = ''.join(
+                f"<li>{wl.symbols[wl.symbol_idx[r]]} is at {prices[wl.symbol_idx[r]]:.2f} "
+                f"({RULE_TYPES[wl.rule_type[r]].replace('_', ' ')} {wl.value[r]:g})</li>"
+                for r in group
+            )
+            recipients.append(wl.user_idx[group[0]])
+            messages.append((wl.users[wl.user_idx[group[0]]], f"Price alerts: {len(group)} triggered",
+                             f"<p>Your price alerts triggered:</p><ul>{lines}</ul>"))
+
+        with ThreadPoolExecutor(max_workers=self.send_workers) as pool:
+            results = list(pool.map(lambda message: self.send(*message), messages))
+        sent = np.array([result.startswith("Email sent") for result in results], dtype=bool)
+        for failure in [result for result, ok in zip(results, sent) if not ok][:5]:
+            logger.error(failure)
+        return np.array(recipients, dtype=np.int32)[sent]
+
+
+def main():
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Evaluate watchlist price alerts and email users")
+    parser.add_argument("watchlist", help="JSON watchlist file")
+    parser.add_argument("--interval", type=float, default=60, help="Seconds between ticks")
+    parser.add_argument("--ticks", type=int, default=0, help="Stop after this many ticks (0 = run forever)")
+    parser.add_argument("--cooldown", type=float, default=3600)
+    parser.add_argument("--reference-reset", choices=sorted(REFERENCE_PERIODS), default="daily",
+                        help="How often the base price of pct_up/pct_down rules is re-taken")
+    args = parser.parse_args()
+
+    watchlist = Watchlist.load(args.watchlist)
+    logger.info(f"Loaded {len(watchlist)} rules for {len(watchlist.users)} users on {len(watchlist.symbols)} symbols")
+    engine = AlertEngine(watchlist, cooldown=args.cooldown,
+                         reference_period=REFERENCE_PERIODS[args.reference_reset])
+    tick = 0
+    while True:
+        result = engine.tick()
+        logger.info(f"Tick {tick}: {result}, evaluated in {engine.last_eval_seconds * 1000:.1f} ms")
+        tick += 1
+        if args.ticks and tick >= args.ticks:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
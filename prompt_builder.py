@@ -0,0 +1,46 @@
+import json
+from functools import lru_cache
+from typing import Any, Dict, List, Sequence
+
+
+def canonical_json(value: Any) -> str:
+    """Serialize deterministically: sorted keys, no insignificant whitespace"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def canonical_tools(tools: Sequence[Dict[str, Any]]) -> str:
+    """Tool schemas in a fixed order (by function name), canonically serialized"""
+    return canonical_json(sorted(tools, key=lambda tool: tool.get("function", {}).get("name", "")))
+
+
+@lru_cache(maxsize=None)
+def static_prefix(model: str, system_prompt: str, tools_json: str, stream: bool = False) -> str:
+    """
+    The request body up to and including the system message. Computed once
+    per process so every request starts with byte-identical text.
+    """
+    return (
+        '{"model":' + canonical_json(model)
+        + ',"stream":' + ("true" if stream else "false")
+        + ',"tools":' + tools_json
+        + ',"messages":[' + canonical_json({"content": system_prompt, "role": "system"})
+    )
+
+
+class PromptBuilder:
+    """
+    Builds OpenAI-compatible chat payloads whose static part (model, tool
+    schemas, system prompt) is always serialized identically and comes first,
+    so a local inference server can reuse its KV/prefix cache across requests.
+    Per-request messages are appended after it.
+    """
+
+    def __init__(self, model: str, system_prompt: str, tools: Sequence[Dict[str, Any]], stream: bool = False):
+        self.prefix = static_prefix(model, system_prompt, canonical_tools(tools), stream)
+
+    def build(self, messages: List[Dict[str, Any]]) -> bytes:
+        """Payload for the system prompt followed by the given conversation messages"""
+        body = self.prefix
+        for message in messages:
+            body += "," + canonical_json(message)
+        return (body + "]}").encode("utf-8")
@@ -0,0 +1,542 @@
+"""
+Local stand-ins for the upstream services the agents talk to.
+
+HTTPStubServer records real HTTP responses into a JSON cassette once
+(acting as a reverse proxy) and replays them afterwards with configurable
+latency and jitter. IMAPStubServer and SMTPStubServer speak just enough of
+their protocols for gmail_reader and email_sender. Canned responses for
+Nominatim, Open-Meteo and OpenAI-compatible chat completions (LM Studio,
+Groq) let everything run offline even before anything was recorded.
+"""
+import base64
+import email
+import glob
+import hashlib
+import imaplib
+import json
+import logging
+import os
+import random
+import re
+import socketserver
+import threading
+import time
+import urllib.error
+import urllib.request
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+logger = logging.getLogger(__name__)
+
+# Response as (status, headers, body)
+StubResponse = Tuple[int, Dict[str, str], bytes]
+
+
+def simulated_delay(latency: float, jitter: float) -> None:
+    """Sleep for latency +/- jitter seconds"""
+    delay = latency + random.uniform(-jitter, jitter) if jitter else latency
+    if delay > 0:
+        time.sleep(delay)
+
+
+def request_key(method: str, path: str, body: bytes = b"") -> str:
+    """Cassette key: method, path and sorted query string, plus a body digest for POSTs"""
+    parts = urlsplit(path)
+    query = "&".join(f"{k}={v}" for k, v in sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    key = f"{method} {parts.path}?{query}"
+    if body:
+        key += " " + hashlib.sha1(body).hexdigest()
+    return key
+
+
+class Cassette:
+    """Recorded HTTP interactions, keyed by request_key and stored as JSON"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.entries = json.load(f)
+
+    def record(self, key: str, response: StubResponse) -> None:
+        status, headers, body = response
+        try:
+            encoded = {"text": body.decode("utf-8")}
+        except UnicodeDecodeError:
+            encoded = {"base64": base64.b64encode(body).decode("ascii")}
+        with self.lock:
+            self.entries[key] = {"status": status, "headers": headers, **encoded}
+
+    def lookup(self, key: str) -> Optional[StubResponse]:
+        entry = self.entries.get(key)
+        if entry is None:
+            # Fall back to any recording for the same method and path
+            prefix = key.split("?", 1)[0] + "?"
+            entry = next((e for k, e in self.entries.items() if k.startswith(prefix)), None)
+        if entry is None:
+            return None
+        body = entry["text"].encode("utf-8") if "text" in entry else base64.b64decode(entry["base64"])
+        return entry["status"], entry["headers"], body
+
+    def save(self) -> None:
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with self.lock, open(self.path, "w") as f:
+            json.dump(self.entries, f, indent=2, sort_keys=True)
+
+
+class _HTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+
+class HTTPStubServer:
+    """
+    Record/replay HTTP server running in a background thread
+
+    Args:
+        cassette (Cassette): Recorded interactions to replay or record into
+        upstream (str): Base URL to proxy to while recording
+        record (bool): Proxy to upstream and record instead of replaying
+        default (callable): (method, path, body) -> StubResponse used when nothing was recorded
+        latency (float): Mean simulated upstream latency in seconds
+        jitter (float): Uniform jitter around the latency in seconds
+    """
+
+    def __init__(self, cassette: Optional[Cassette] = None, upstream: Optional[str] = None,
+                 record: bool = False, default: Optional[Callable[[str, str, bytes], StubResponse]] = None,
+                 latency: float = 0.0, jitter: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        if record and not upstream:
+            raise ValueError("Recording requires an upstream URL")
+        self.cassette = cassette or Cassette()
+        self.upstream = upstream.rstrip("/") if upstream else None
+        self.record = record
+        self.default = default
+        self.latency = latency
+        self.jitter = jitter
+        self.requests_served = 0
+        self.server = _HTTPServer((host, port), self._handler_class())
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "HTTPStubServer":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        if self.record:
+            self.cassette.save()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    def respond(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> StubResponse:
+        key = request_key(method, path, body)
+        if self.record:
+            response = self._forward(method, path, headers, body)
+            self.cassette.record(key, response)
+            return response
+        simulated_delay(self.latency, self.jitter)
+        response = self.cassette.lookup(key)
+        if response is None and self.default is not None:
+            response = self.default(method, path, body)
+        if response is None:
+            return 404, {"Content-Type": "text/plain"}, f"No recording for {key}".encode()
+        return response
+
+    def _forward(self, method: str, path: str, headers: Dict[str, str], body: bytes) -> StubResponse:
+        forwarded = {k: v for k, v in headers.items()
+                     if k.lower() in ("content-type", "authorization", "user-agent", "accept")}
+        request = urllib.request.Request(self.upstream + path, data=body or None,
+                                         headers=forwarded, method=method)
+        try:
+            with urllib.request.urlopen(request, timeout=600) as response:
+                return response.status, {"Content-Type": response.headers.get("Content-Type", "")}, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, {"Content-Type": e.headers.get("Content-Type", "")}, e.read()
+
+    def _handler_class(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def _handle(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                body = self.rfile.read(length) if length else b""
+                status, headers, payload = stub.respond(self.command, self.path, dict(self.headers), body)
+                stub.requests_served += 1
+                self.send_response(status)
+                for name, value in headers.items():
+                    if name.lower() not in ("content-length", "transfer-encoding", "connection"):
+                        self.send_header(name, value)
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+            def log_message(self, format, *args):
+                logger.debug("stub %s: " + format, stub.url, *args)
+
+        return Handler
+
+
+def json_response(data: Any, status: int = 200) -> StubResponse:
+    return status, {"Content-Type": "application/json"}, json.dumps(data).encode("utf-8")
+
+
+def nominatim_response(method: str, path: str, body: bytes) -> StubResponse:
+    """Canned geocoding result; the coordinates are derived from the query so cities differ"""
+    query = dict(parse_qsl(urlsplit(path).query)).get("q", "")
+    digest = int(hashlib.md5(query.lower().encode()).hexdigest(), 16)
+    lat = (digest % 1400) / 10 - 70
+    lon = (digest // 1400 % 3600) / 10 - 180
+    return json_response([{"lat": f"{lat:.4f}", "lon": f"{lon:.4f}", "display_name": query}])
+
+
+def open_meteo_response(method: str, path: str, body: bytes) -> StubResponse:
+    """Canned Open-Meteo forecast for 'current' and hourly/daily requests, one object per location"""
+    params = dict(parse_qsl(urlsplit(path).query))
+    latitudes = params.get("latitude", "0").split(",")
+    longitudes = params.get("longitude", "0").split(",")
+    now = datetime.now().replace(second=0, microsecond=0)
+    results = []
+    for index, (lat, lon) in enumerate(zip(latitudes, longitudes)):
+        result: Dict[str, Any] = {"latitude": float(lat), "longitude": float(lon)}
+        rng = random.Random(f"{lat},{lon}")
+        if "current" in params:
+            result["current"] = {"time": now.strftime("%Y-%m-%dT%H:%M"), "interval": 900}
+            for var in params["current"].split(","):
+                result["current"][var] = round(rng.uniform(0, 25), 1)
+        for frequency, step in (("hourly", 3600), ("daily", 86400)):
+            if frequency not in params:
+                continue
+            steps = int(params.get("forecast_days", 7)) * 86400 // step
+            start = int(datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0).timestamp())
+            series: Dict[str, Any] = {"time": [start + i * step for i in range(steps)]}
+            for var in params[frequency].split(","):
+                series[var] = [round(rng.uniform(0, 25), 1) for _ in range(steps)]
+            result[frequency] = series
+        results.append(result)
+    return json_response(results if len(results) > 1 else results[0])
+
+
+def chat_completion_response(method: str, path: str, body: bytes) -> StubResponse:
+    """Canned OpenAI-compatible chat completion (LM Studio, Groq)"""
+    try:
+        request = json.loads(body or b"{}")
+    except json.JSONDecodeError:
+        request = {}
+    prompt = json.dumps(request.get("messages", []))
+    content = "The weather is mild with a light breeze. (stubbed completion)"
+    prompt_tokens = max(1, len(prompt) // 4)
+    completion_tokens = max(1, len(content) // 4)
+    return json_response({
+        "id": "chatcmpl-stub",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": request.get("model", "stub"),
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+        },
+    })
+
+
+class PrefixCachingCompletions:
+    """
+    Chat completion responder that simulates a server-side prompt prefix cache
+
+    The prompt is rendered from the request the way chat templates do (tools
+    as sent, then each message), prefill costs `seconds_per_token` for every
+    token after the longest prefix shared with a cached prompt, and the
+    simulated prompt-processing time is reported per request.
+    """
+
+    def __init__(self, seconds_per_token: float = 0.0005, chars_per_token: int = 4, cache_entries: int = 16):
+        self.seconds_per_token = seconds_per_token
+        self.chars_per_token = chars_per_token
+        self.cache_entries = cache_entries
+        self.cache: List[str] = []
+        self.lock = threading.Lock()
+        self.prompt_ms: List[Tuple[float, int, int]] = []
+
+    @staticmethod
+    def render(request: Dict[str, Any]) -> str:
+        prompt = json.dumps(request.get("tools", []))
+        for message in request.get("messages", []):
+            prompt += f"<|{message.get('role')}|>{message.get('content')}"
+        return prompt
+
+    def __call__(self, method: str, path: str, body: bytes) -> StubResponse:
+        if method != "POST":
+            return json_response({"status": "ok"})
+        request = json.loads(body or b"{}")
+        prompt = self.render(request)
+        with self.lock:
+            shared = max((len(os.path.commonprefix([prompt, cached])) for cached in self.cache), default=0)
+            self.cache = ([prompt] + [c for c in self.cache if c != prompt])[:self.cache_entries]
+        prompt_tokens = max(1, len(prompt) // self.chars_per_token)
+        cached_tokens = shared // self.chars_per_token
+        prefill = (prompt_tokens - cached_tokens) * self.seconds_per_token
+        time.sleep(prefill)
+        with self.lock:
+            self.prompt_ms.append((prefill * 1000, prompt_tokens, cached_tokens))
+
+        status, headers, payload = chat_completion_response(method, path, body)
+        data = json.loads(payload)
+        data["usage"]["prompt_tokens"] = prompt_tokens
+        data["usage"]["prompt_tokens_details"] = {"cached_tokens": cached_tokens}
+        data["timings"] = {"prompt_ms": prefill * 1000, "cache_n": cached_tokens}
+        return json_response(data)
+
+
+class _LineServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 1024
+
+
+class _TCPStubServer:
+    """Shared start/stop plumbing for the line-based protocol stubs"""
+
+    def __init__(self, handler, latency: float, jitter: float, host: str, port: int):
+        self.latency = latency
+        self.jitter = jitter
+        self.server = _LineServer((host, port), handler)
+        self.server.stub = self
+        self.thread = None
+
+    @property
+    def host(self) -> str:
+        return self.server.server_address[0]
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+class _IMAPHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+
+    def send(self, line: str) -> None:
+        self.wfile.write(line.encode("utf-8") + b"\r\n")
+
+    def handle(self):
+        stub = self.server.stub
+        self.send("* OK IMAP4rev1 stub ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            parts = line.decode("utf-8", "replace").strip().split(" ", 2)
+            if len(parts) < 2:
+                continue
+            tag, command = parts[0], parts[1].upper()
+            argument = parts[2] if len(parts) > 2 else ""
+            simulated_delay(stub.latency, stub.jitter)
+
+            if command == "CAPABILITY":
+                self.send("* CAPABILITY IMAP4rev1 AUTH=PLAIN")
+                self.send(f"{tag} OK CAPABILITY completed")
+            elif command == "LOGIN":
+                self.send(f"{tag} OK LOGIN completed")
+            elif command in ("SELECT", "EXAMINE"):
+                self.send(f"* {len(stub.messages)} EXISTS")
+                self.send(f"{tag} OK [READ-WRITE] {command} completed")
+            elif command == "SEARCH":
+                ids = " ".join(str(i + 1) for i in stub.search(argument))
+                self.send(f"* SEARCH {ids}".rstrip())
+                self.send(f"{tag} OK SEARCH completed")
+            elif command == "FETCH":
+                message_set = argument.split(" ", 1)[0]
+                for number in message_set.split(","):
+                    raw = stub.messages[int(number) - 1]
+                    self.wfile.write(f"* {number} FETCH (RFC822 {{{len(raw)}}}\r\n".encode() + raw + b")\r\n")
+                self.send(f"{tag} OK FETCH completed")
+            elif command in ("NOOP", "CLOSE"):
+                self.send(f"{tag} OK {command} completed")
+            elif command == "LOGOUT":
+                self.send("* BYE stub logging out")
+                self.send(f"{tag} OK LOGOUT completed")
+                return
+            else:
+                self.send(f"{tag} BAD {command} not supported by stub")
+
+
+class IMAPStubServer(_TCPStubServer):
+    """
+    Plain-text IMAP server serving a fixed mailbox of raw RFC822 messages
+
+    Supports the LOGIN/SELECT/SEARCH FROM/FETCH RFC822/CLOSE/LOGOUT subset
+    that gmail_reader uses. Point it at gmail_reader with IMAP_HOST,
+    IMAP_PORT and IMAP_SSL=0.
+    """
+
+    def __init__(self, messages: List[bytes], latency: float = 0.0, jitter: float = 0.0,
+                 host: str = "127.0.0.1", port: int = 0):
+        self.messages = messages
+        self.senders = [(email.message_from_bytes(raw).get("From") or "").lower() for raw in messages]
+        super().__init__(_IMAPHandler, latency, jitter, host, port)
+
+    def search(self, criteria: str) -> List[int]:
+        match = re.search(r'FROM\s+"([^"]*)"', criteria, re.IGNORECASE)
+        needle = match.group(1).lower() if match else ""
+        return [i for i, sender in enumerate(self.senders) if needle in sender]
+
+
+class _SMTPHandler(socketserver.StreamRequestHandler):
+    disable_nagle_algorithm = True
+
+    def send(self, line: str) -> None:
+        self.wfile.write(line.encode("utf-8") + b"\r\n")
+
+    def handle(self):
+        stub = self.server.stub
+        self.send("220 stub ESMTP ready")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode("utf-8", "replace").strip().split(" ", 1)[0].upper()
+            simulated_delay(stub.latency, stub.jitter)
+
+            if command in ("EHLO", "HELO"):
+                self.send("250-stub")
+                self.send("250-AUTH PLAIN LOGIN")
+                self.send("250 OK")
+            elif command == "AUTH":
+                self.send("235 Authentication successful")
+            elif command in ("MAIL", "RCPT", "RSET", "NOOP"):
+                self.send("250 OK")
+            elif command == "DATA":
+                self.send("354 End data with <CR><LF>.<CR><LF>")
+                size = 0
+                for data_line in self.rfile:
+                    if data_line in (b".\r\n", b".\n"):
+                        break
+                    size += len(data_line)
+                with stub.lock:
+                    stub.messages_received += 1
+                    stub.bytes_received += size
+                self.send("250 OK queued")
+            elif command == "QUIT":
+                self.send("221 Bye")
+                return
+            else:
+                self.send("502 Command not implemented")
+
+
+class SMTPStubServer(_TCPStubServer):
+    """
+    SMTP sink that accepts and discards mail, for email_sender with
+    SMTP_HOST, SMTP_PORT and SMTP_STARTTLS=0
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, host: str = "127.0.0.1", port: int = 0):
+        self.lock = threading.Lock()
+        self.messages_received = 0
+        self.bytes_received = 0
+        super().__init__(_SMTPHandler, latency, jitter, host, port)
+
+
+def load_mailbox(directory: str) -> List[bytes]:
+    """Read every .eml file in a directory, in name order"""
+    messages = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.eml"))):
+        with open(path, "rb") as f:
+            messages.append(f.read())
+    return messages
+
+
+def synthetic_mailbox(count: int, body_size: int = 4000, attachment_size: int = 20000,
+                      seed: int = 0) -> List[bytes]:
+    """Generate multipart messages with encoded headers, QP bodies and base64 attachments"""
+    from email.mime.application import MIMEApplication
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+    from email.header import Header
+
+    rng = random.Random(seed)
+    words = ["weather", "invoice", "meeting", "report", "stock", "alert", "café", "Zürich", "agent", "summary"]
+    messages = []
+    for i in range(count):
+        msg = MIMEMultipart()
+        msg["From"] = f"Sender {i % 7} <sender{i % 7}@example.com>"
+        msg["To"] = "bench@example.com"
+        msg["Subject"] = Header(f"{rng.choice(words)} #{i} – {rng.choice(words)}", "utf-8").encode()
+        msg["Date"] = format_datetime(datetime.fromtimestamp(1704067200 + i * 3600, timezone.utc))
+        text = " ".join(rng.choice(words) for _ in range(body_size // 7))
+        msg.attach(MIMEText(text, "plain", "utf-8"))
+        if attachment_size:
+            attachment = MIMEApplication(rng.randbytes(attachment_size), Name=f"report-{i}.bin")
+            attachment["Content-Disposition"] = f'attachment; filename="report-{i}.bin"'
+            msg.attach(attachment)
+        messages.append(msg.as_bytes())
+    return messages
+
+
+def record_mailbox(directory: str, email_address: str, password: str, search_address: str = "",
+                   max_emails: int = 200, host: str = "imap.gmail.com", port: Optional[int] = None,
+                   ssl: bool = True) -> int:
+    """Download raw messages from a real IMAP account into .eml files for later replay"""
+    os.makedirs(directory, exist_ok=True)
+    mail = imaplib.IMAP4_SSL(host, port or 993) if ssl else imaplib.IMAP4(host, port or 143)
+    try:
+        mail.login(email_address, password)
+        mail.select("INBOX", readonly=True)
+        criteria = f'FROM "{search_address}"' if search_address else "ALL"
+        status, data = mail.search(None, criteria)
+        if status != "OK":
+            return 0
+        email_ids = data[0].split()[-max_emails:]
+        for email_id in email_ids:
+            status, msg_data = mail.fetch(email_id, "(RFC822)")
+            if status == "OK":
+                with open(os.path.join(directory, f"{int(email_id):08d}.eml"), "wb") as f:
+                    f.write(msg_data[0][1])
+        return len(email_ids)
+    finally:
+        try:
+            mail.logout()
+        except Exception:
+            pass
@@ -0,0 +1,145 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+import weather_forecast
+from weather_forecast import ForecastStore, fetch_forecasts, make_forecast_tools
+
+DATA = os.path.join(os.path.dirname(__file__), 'data', 'open_meteo_hourly.json')
+T0 = 1700000000
+HOUR = 3600
+LOCATIONS = [('Berlin', 52.52, 13.41), ('Paris', 48.86, 2.35), ('London', 51.51, -0.13)]
+VARIABLES = ['wind_speed_10m', 'temperature_2m']
+
+
+@pytest.fixture
+def responses():
+    with open(DATA, encoding='utf-8') as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def store(responses):
+    return ForecastStore.from_responses(LOCATIONS, responses, VARIABLES)
+
+
+class FakeSession:
+    """Answers each request with the canned forecasts for the requested coordinates"""
+
+    def __init__(self, responses):
+        self.responses = responses
+        self.requests = []
+
+    def get(self, url, params=None, timeout=None):
+        self.requests.append(params)
+        latitudes = [float(lat) for lat in params['latitude'].split(',')]
+        matches = [r for lat in latitudes for r in self.responses if r['latitude'] == lat]
+        return FakeResponse(matches if len(matches) > 1 else matches[0])
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.data
+
+
+def test_from_responses_builds_location_by_time_arrays(store):
+    assert list(store.names) == ['Berlin', 'Paris', 'London']
+    assert store.times.tolist() == [T0 + i * HOUR for i in range(6)]
+    wind = store.data['wind_speed_10m']
+    assert wind.shape == (3, 6)
+    assert wind.dtype == np.float32
+    assert wind[0].tolist() == [5, 10, 16, 14, 17, 9]
+    # null in the JSON becomes NaN
+    assert np.isnan(wind[1, 2])
+
+
+def test_from_responses_rejects_mismatched_locations(responses):
+    with pytest.raises(ValueError):
+        ForecastStore.from_responses(LOCATIONS[:2], responses, VARIABLES)
+
+
+def test_fetch_forecasts_batches_locations(monkeypatch, responses):
+    monkeypatch.setattr(weather_forecast, 'LOCATIONS_PER_REQUEST', 2)
+    session = FakeSession(responses)
+    store = fetch_forecasts(LOCATIONS, VARIABLES, session=session)
+
+    # 3 locations in batches of 2: a list response, then a single object
+    assert len(session.requests) == 2
+    assert session.requests[0]['hourly'] == 'wind_speed_10m,temperature_2m'
+    assert session.requests[0]['timeformat'] == 'unixtime'
+    assert session.requests[0]['wind_speed_unit'] == 'ms'
+    assert store.data['wind_speed_10m'][2, 0] == 20
+
+
+def test_aggregate_ignores_missing_values(store):
+    means = store.aggregate('wind_speed_10m', 'mean')
+    assert means[1] == pytest.approx(5.0)
+    assert store.aggregate('wind_speed_10m', 'max', T0, T0 + 2 * HOUR).tolist() == [10, 4, 20]
+    with pytest.raises(ValueError):
+        store.aggregate('wind_speed_10m', 'median')
+
+
+def test_rolling_mean_ignores_missing_values(store):
+    rolling = store.rolling_mean('wind_speed_10m', 2)
+    assert rolling.shape == (3, 5)
+    np.testing.assert_allclose(rolling[1], [3.5, 4.0, 5.0, 5.5, 6.5])
+    for steps in (0, 7):
+        with pytest.raises(ValueError):
+            store.rolling_mean('wind_speed_10m', steps)
+
+
+def test_threshold_crossings_marks_upward_crossings(store):
+    crossings = store.threshold_crossings('wind_speed_10m', 15)
+    assert crossings[0].tolist() == [False, False, True, False, True, False]
+    assert not crossings[1].any()
+    assert crossings[2].tolist() == [True, False, False, True, False, False]
+
+
+def test_first_exceedance(store):
+    first = store.first_exceedance('wind_speed_10m', 15)
+    assert first.tolist() == [T0 + 2 * HOUR, -1, T0]
+    # Restricted to a window starting after London's first gust
+    assert store.first_exceedance('wind_speed_10m', 15, start=T0 + HOUR).tolist() == \
+        [T0 + 2 * HOUR, -1, T0 + 3 * HOUR]
+
+
+def test_sites_exceeding(store):
+    assert store.sites_exceeding('wind_speed_10m', 15) == [
+        ('Berlin', 17.0, T0 + 2 * HOUR),
+        ('London', 20.0, T0),
+    ]
+    assert store.sites_exceeding('wind_speed_10m', 25) == []
+
+
+def test_save_and_load_round_trip(store, tmp_path):
+    store.save(str(tmp_path))
+    loaded = ForecastStore.load(str(tmp_path))
+    assert isinstance(loaded.data['wind_speed_10m'], np.memmap)
+    assert loaded.sites_exceeding('wind_speed_10m', 15) == store.sites_exceeding('wind_speed_10m', 15)
+
+
+def test_sites_above_threshold_tool(store):
+    sites_above_threshold, _ = make_forecast_tools(store)
+    assert json.loads(sites_above_threshold('wind_speed_10m', 15)) == [
+        {'location': 'Berlin', 'peak': 17.0, 'first_exceeds_at': T0 + 2 * HOUR},
+        {'location': 'London', 'peak': 20.0, 'first_exceeds_at': T0},
+    ]
+    # Only the first two hours: Berlin has not reached 15 m/s yet
+    assert [site['location'] for site in json.loads(sites_above_threshold('wind_speed_10m', 15, hours=2))] == \
+        ['London']
+    assert 'error' in json.loads(sites_above_threshold('snow_depth', 1))
+
+
+def test_aggregate_forecast_tool(store):
+    _, aggregate_forecast = make_forecast_tools(store)
+    assert json.loads(aggregate_forecast('temperature_2m', 'min')) == {'Berlin': 1.0, 'Paris': 8.0, 'London': -2.0}
+    assert 'error' in json.loads(aggregate_forecast('temperature_2m', 'median'))
+    assert 'error' in json.loads(aggregate_forecast('snow_depth'))
@@ -1,11 +1,13 @@
 import logging
 import json
+import os
 import requests
 from datetime import datetime
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, Iterable, Optional, Tuple
 from phi.agent import Agent
 from phi.model.groq import Groq
 from dotenv import load_dotenv
+from weather_forecast import OPEN_METEO_URL, ForecastStore, fetch_forecasts, make_forecast_tools
 
 # Load environment variables
 load_dotenv()
@@ -17,30 +19,46 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Upstream endpoints, overridable so the agent can run against local stubs
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+
 class WeatherAgent:
-    def __init__(self):
+    def __init__(self, forecast_store_path: Optional[str] = None):
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'WeatherAgent/3.0',
             'Content-Type': 'application/json'
         })
         
+        # Forecast tools answer multi-site questions from the local columnar store
+        self.forecast_store_path = forecast_store_path
+        self.forecast_store = None
+        tools = []
+        if forecast_store_path and os.path.exists(os.path.join(forecast_store_path, 'meta.json')):
+            self.forecast_store = ForecastStore.load(forecast_store_path)
+            tools = make_forecast_tools(self.forecast_store)
+
         # Initialize Groq agent
         self.agent = Agent(
             name="Weather Agent",
             model=Groq(id="llama-3.3-70b-versatile"),
             instructions="You are a helpful weather assistant that can get weather data for any city.",
+            tools=tools,
             show_tool_calls=True,
             markdown=True,
             debug_mode=True
         )
 
+    def reset(self) -> None:
+        """Drop the runs and messages the Groq agent has accumulated in memory"""
+        self.agent.memory.clear()
+
     def get_coordinates(self, city: str) -> Tuple[Optional[float], Optional[float]]:
         try:
             logger.debug(f"Fetching coordinates for city: {city}")
             params = {'format': 'json', 'q': city}
             response = self.session.get(
-                "https://nominatim.openstreetmap.org/search",
+                NOMINATIM_URL,
                 params=params,
                 timeout=10
             )
@@ -67,7 +85,7 @@ class WeatherAgent:
                 'timezone': 'auto'
             }
             response = self.session.get(
-                "https://api.open-meteo.com/v1/forecast",
+                OPEN_METEO_URL,
                 params=params,
                 timeout=10
             )
@@ -92,6 +110,18 @@ class WeatherAgent:
             logger.error(f"Error getting weather data: {e}")
             return {'error': str(e)}
 
+    def get_forecast(self, locations: Iterable, frequency: str = 'hourly',
+                     forecast_days: int = 7) -> ForecastStore:
+        """Fetch hourly or daily forecasts for many locations into the columnar store"""
+        logger.info(f"Fetching {frequency} forecasts")
+        store = fetch_forecasts(locations, frequency=frequency, forecast_days=forecast_days,
+                                session=self.session)
+        if self.forecast_store_path:
+            store.save(self.forecast_store_path)
+        self.forecast_store = store
+        self.agent.tools = make_forecast_tools(store)
+        return store
+
     def get_current_date(self) -> str:
         return datetime.now().strftime("%Y-%m-%d")
 
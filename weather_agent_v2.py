@@ -1,8 +1,10 @@
 import json
+import os
 import requests
 import logging
 from datetime import datetime
 from typing import Dict, Any, Optional, Tuple
+from prompt_builder import PromptBuilder
 
 # Enhanced logging configuration for detailed debugging
 logging.basicConfig(
@@ -11,6 +13,11 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Upstream endpoints, overridable so the agent can run against local stubs
+NOMINATIM_URL = os.getenv("NOMINATIM_URL", "https://nominatim.openstreetmap.org/search")
+OPEN_METEO_URL = os.getenv("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+LM_STUDIO_API_URL = os.getenv("LM_STUDIO_API_URL", "http://localhost:1234/v1/chat/completions")
+
 class WeatherAgent:
     def __init__(self):
         self.session = requests.Session()
@@ -19,10 +26,18 @@ class WeatherAgent:
             'Content-Type': 'application/json'
         })
         
-        self.LM_STUDIO_API_URL = "http://localhost:1234/v1/chat/completions"
+        self.LM_STUDIO_API_URL = LM_STUDIO_API_URL
+        self.model = 'mistral-nemo-instruct-2407'
         self.system_prompt = "You are a helpful weather assistant that can get weather data for any city."
         self.tools = self._initialize_tools()
         self.messages = [{"role": "system", "content": self.system_prompt}]
+        # System prompt and tool schemas are serialized once, identically, ahead of
+        # the per-request messages so the server's prompt prefix cache is reused
+        self.prompt_builder = PromptBuilder(self.model, self.system_prompt, self.tools)
+
+    def reset(self) -> None:
+        """Forget earlier queries so the next one starts from the system prompt alone"""
+        self.messages = [{"role": "system", "content": self.system_prompt}]
 
     def _initialize_tools(self) -> list:
         return [
@@ -79,7 +94,7 @@ class WeatherAgent:
             logger.debug(f"Fetching coordinates for city: {city}")
             params = {'format': 'json', 'q': city}
             response = self.session.get(
-                "https://nominatim.openstreetmap.org/search",
+                NOMINATIM_URL,
                 params=params,
                 timeout=10
             )
@@ -105,7 +120,7 @@ class WeatherAgent:
                 'current': 'temperature_2m,wind_speed_10m'
             }
             response = self.session.get(
-                "https://api.open-meteo.com/v1/forecast",
+                OPEN_METEO_URL,
                 params=params,
                 timeout=10
             )
@@ -124,14 +139,9 @@ class WeatherAgent:
         try:
             self.messages.append({"role": "user", "content": user_query})
             
-            payload = {
-                'model': 'mistral-nemo-instruct-2407',
-                'messages': self.messages,
-                'tools': self.tools,
-                'stream': False
-            }
+            payload = self.prompt_builder.build(self.messages[1:])
             
-            logger.debug(f"Sending request to LM Studio API: {payload}")
+            logger.debug(f"Sending request to LM Studio API: {payload.decode('utf-8')}")
             
             self.session.headers.update({
                 'Connection': 'keep-alive',
@@ -140,7 +150,7 @@ class WeatherAgent:
             
             response = self.session.post(
                 self.LM_STUDIO_API_URL,
-                json=payload,
+                data=payload,
                 timeout=600,
                 stream=True
             )
@@ -237,9 +247,10 @@ class WeatherAgent:
             f"Time: {weather_data.get('time', 'N/A')}"
         )
         
+        # Fixed instructions first, volatile data last, to keep the shared prefix long
         lm_response = self.call_lm_studio(
-            f"Here is the current weather data for {city}:\n{weather_info}\n"
-            "Please summarize this weather information in a user-friendly way."
+            "Please summarize this weather information in a user-friendly way.\n"
+            f"Here is the current weather data for {city}:\n{weather_info}"
         )
         
         return {
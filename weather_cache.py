@@ -0,0 +1,241 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def is_error_result(value: Any) -> bool:
+    """
+    Whether a query_weather result is a failure: an 'error' key at the top
+    level, or in a nested part such as v2's lm_response when LM Studio fails
+    """
+    if not isinstance(value, dict):
+        return True
+    if 'error' in value:
+        return True
+    return any(isinstance(part, dict) and 'error' in part for part in value.values())
+
+
+class CacheEntry:
+    __slots__ = ('value', 'fetched_at', 'expires_at')
+
+    def __init__(self, value: Dict[str, Any], fetched_at: float, expires_at: float):
+        self.value = value
+        self.fetched_at = fetched_at
+        self.expires_at = expires_at
+
+
+class RefreshBudget:
+    """Token bucket limiting background refreshes per minute"""
+
+    def __init__(self, per_minute: float, clock: Callable[[], float]):
+        self.capacity = max(1.0, per_minute)
+        self.rate = per_minute / 60.0
+        self.tokens = self.capacity
+        self.clock = clock
+        self.updated = clock()
+
+    def try_acquire(self) -> bool:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class WeatherCache:
+    """
+    Stale-while-revalidate cache in front of WeatherAgent.query_weather
+
+    Fresh entries are returned directly. Expired entries are still returned
+    (for up to `stale_ttl` seconds) while a refresh runs in the background.
+    A scheduler thread tracks how popular each city is and refreshes the hot
+    ones shortly before they expire, so their callers never wait on the
+    geocode + forecast + LLM chain. Background refreshes are limited by
+    `refreshes_per_minute` to respect upstream rate limits.
+
+    Args:
+        loader (callable): city -> result dict, e.g. WeatherAgent().query_weather
+        ttl (float): Seconds an entry is fresh
+        stale_ttl (float): Seconds past expiry an entry may still be served
+        refresh_ahead (float): Refresh hot entries this many seconds before expiry
+        refreshes_per_minute (float): Background refresh budget
+        hot_cities (int): How many of the most popular cities to keep warm
+        popularity_half_life (float): Seconds for a city's request count to decay by half
+        workers (int): Threads running background refreshes
+        max_entries (int): Cities kept in memory; the least popular are evicted beyond this
+    """
+
+    def __init__(self, loader: Callable[[str], Dict[str, Any]], ttl: float = 600, stale_ttl: float = 3600,
+                 refresh_ahead: float = 60, refreshes_per_minute: float = 30, hot_cities: int = 20,
+                 popularity_half_life: float = 3600, workers: int = 2, max_entries: int = 10000,
+                 clock: Callable[[], float] = time.monotonic):
+        self.loader = loader
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.refresh_ahead = refresh_ahead
+        self.hot_cities = hot_cities
+        self.popularity_half_life = popularity_half_life
+        self.max_entries = max_entries
+        self.clock = clock
+        self.budget = RefreshBudget(refreshes_per_minute, clock)
+
+        self.entries: Dict[str, CacheEntry] = {}
+        self.popularity: Dict[str, List[float]] = {}  # key -> [score, last update]
+        self.cities: Dict[str, str] = {}  # key -> city name as first requested
+        self.refreshing = set()
+        self.lock = threading.Lock()
+        self.load_locks: Dict[str, threading.Lock] = {}
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='weather-refresh')
+        self.stats = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'refreshes': 0,
+                      'refresh_errors': 0, 'refreshes_skipped': 0, 'evictions': 0}
+        self._stop = threading.Event()
+        self._scheduler: Optional[threading.Thread] = None
+
+    @staticmethod
+    def key(city: str) -> str:
+        return city.strip().lower()
+
+    def get(self, city: str) -> Dict[str, Any]:
+        key = self.key(city)
+        now = self.clock()
+        with self.lock:
+            self.cities.setdefault(key, city)
+            self._bump_popularity(key, now)
+            entry = self.entries.get(key)
+            if entry and now < entry.expires_at:
+                self.stats['hits'] += 1
+                return entry.value
+            if entry and now < entry.expires_at + self.stale_ttl:
+                self.stats['stale_hits'] += 1
+                self._schedule_refresh(key)
+                return entry.value
+            self.stats['misses'] += 1
+            load_lock = self.load_locks.setdefault(key, threading.Lock())
+
+        # Cold miss: load synchronously, once per city even with concurrent callers
+        with load_lock:
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry and self.clock() < entry.expires_at:
+                    return entry.value
+            return self._load(key, city)
+
+    def start(self, interval: float = 1.0) -> 'WeatherCache':
+        """Start the background scheduler that keeps popular cities warm"""
+        if self._scheduler is None:
+            self._stop.clear()
+            self._scheduler = threading.Thread(target=self._run, args=(interval,),
+                                               name='weather-refresh-scheduler', daemon=True)
+            self._scheduler.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._scheduler is not None:
+            self._scheduler.join()
+            self._scheduler = None
+        self.executor.shutdown(wait=True)
+
+    def hot_keys(self) -> List[str]:
+        """Most popular cities by decayed request count"""
+        now = self.clock()
+        with self.lock:
+            scores = {key: self._decayed(score, updated, now) for key, (score, updated) in self.popularity.items()}
+        return sorted(scores, key=scores.get, reverse=True)[:self.hot_cities]
+
+    def refresh_due(self) -> None:
+        """Evict dead entries, then schedule refreshes for hot cities that are about to expire"""
+        now = self.clock()
+        with self.lock:
+            self._evict(now)
+        for key in self.hot_keys():
+            with self.lock:
+                entry = self.entries.get(key)
+                if entry and entry.expires_at - now <= self.refresh_ahead:
+                    self._schedule_refresh(key)
+
+    def _run(self, interval: float) -> None:
+        while not self._stop.wait(interval):
+            try:
+                self.refresh_due()
+            except Exception as e:
+                logger.error(f"Weather refresh scheduler error: {e}")
+
+    def _evict(self, now: float) -> None:
+        """
+        Drop entries past their stale window and popularity records that have
+        gone cold, then the least popular cities beyond max_entries. Cities are
+        arbitrary caller input, so without this memory grows with every new
+        name; caller holds self.lock.
+        """
+        for key in [key for key, entry in self.entries.items() if now >= entry.expires_at + self.stale_ttl]:
+            del self.entries[key]
+            self.stats['evictions'] += 1
+        scores = {key: self._decayed(score, updated, now) for key, (score, updated) in self.popularity.items()}
+        # Ten half-lives: a city asked for once has been forgotten
+        for key in [key for key, score in scores.items() if score < 2 ** -10 and key not in self.entries]:
+            del self.popularity[key]
+            del scores[key]
+        if len(scores) > self.max_entries or len(self.entries) > self.max_entries:
+            # Trim to 90% so a stream of new cities doesn't sort on every insert
+            keep = self.max_entries * 9 // 10
+            for key in sorted(scores, key=scores.get)[:max(0, len(scores) - keep)]:
+                del self.popularity[key]
+            for key in sorted(self.entries, key=lambda k: scores.get(k, 0.0))[:max(0, len(self.entries) - keep)]:
+                del self.entries[key]
+                self.stats['evictions'] += 1
+        for key in list(self.cities.keys() | self.load_locks.keys()):
+            if key in self.entries or key in self.popularity or key in self.refreshing:
+                continue
+            lock = self.load_locks.get(key)
+            if lock is not None and lock.locked():
+                continue  # a cold load for this city is in progress
+            self.cities.pop(key, None)
+            self.load_locks.pop(key, None)
+
+    def _decayed(self, score: float, updated: float, now: float) -> float:
+        return score * 0.5 ** ((now - updated) / self.popularity_half_life)
+
+    def _bump_popularity(self, key: str, now: float) -> None:
+        score, updated = self.popularity.get(key, (0.0, now))
+        self.popularity[key] = [self._decayed(score, updated, now) + 1, now]
+
+    def _schedule_refresh(self, key: str) -> None:
+        """Queue a background refresh; caller holds self.lock"""
+        if key in self.refreshing:
+            return
+        if not self.budget.try_acquire():
+            self.stats['refreshes_skipped'] += 1
+            return
+        self.refreshing.add(key)
+        self.executor.submit(self._refresh, key)
+
+    def _refresh(self, key: str) -> None:
+        try:
+            value = self._load(key, self.cities[key])
+            with self.lock:
+                self.stats['refresh_errors' if is_error_result(value) else 'refreshes'] += 1
+        except Exception as e:
+            logger.error(f"Error refreshing weather for {key}: {e}")
+            with self.lock:
+                self.stats['refresh_errors'] += 1
+        finally:
+            with self.lock:
+                self.refreshing.discard(key)
+
+    def _load(self, key: str, city: str) -> Dict[str, Any]:
+        value = self.loader(city)
+        # Errors are returned to the caller but never cached
+        if not is_error_result(value):
+            now = self.clock()
+            with self.lock:
+                self.entries[key] = CacheEntry(value, now, now + self.ttl)
+                if len(self.entries) > self.max_entries:
+                    self._evict(now)
+        return value
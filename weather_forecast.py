@@ -0,0 +1,245 @@
+import json
+import logging
+import os
+import warnings
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import requests
+
+logger = logging.getLogger(__name__)
+
+OPEN_METEO_URL = os.getenv("OPEN_METEO_URL", "https://api.open-meteo.com/v1/forecast")
+DEFAULT_VARIABLES = {
+    'hourly': ['temperature_2m', 'wind_speed_10m', 'precipitation'],
+    'daily': ['temperature_2m_max', 'temperature_2m_min', 'wind_speed_10m_max', 'precipitation_sum'],
+}
+# Open-Meteo accepts comma separated coordinate lists; keep URLs a sane length
+LOCATIONS_PER_REQUEST = 100
+
+
+def normalize_location(location) -> Dict[str, Any]:
+    """Accept {'name', 'latitude', 'longitude'} dicts or (name, lat, lon) tuples"""
+    if isinstance(location, dict):
+        return {
+            'name': location.get('name') or f"{location['latitude']},{location['longitude']}",
+            'latitude': float(location['latitude']),
+            'longitude': float(location['longitude']),
+        }
+    name, latitude, longitude = location
+    return {'name': name, 'latitude': float(latitude), 'longitude': float(longitude)}
+
+
+def fetch_forecasts(locations: Iterable, variables: Optional[Sequence[str]] = None,
+                    frequency: str = 'hourly', forecast_days: int = 7,
+                    session: Optional[requests.Session] = None,
+                    url: str = OPEN_METEO_URL) -> 'ForecastStore':
+    """Fetch forecast series for many locations with one request per batch of locations"""
+    locations = [normalize_location(location) for location in locations]
+    variables = list(variables or DEFAULT_VARIABLES[frequency])
+    session = session or requests.Session()
+    responses = []
+    for start in range(0, len(locations), LOCATIONS_PER_REQUEST):
+        batch = locations[start:start + LOCATIONS_PER_REQUEST]
+        params = {
+            'latitude': ','.join(str(loc['latitude']) for loc in batch),
+            'longitude': ','.join(str(loc['longitude']) for loc in batch),
+            frequency: ','.join(variables),
+            'forecast_days': forecast_days,
+            'timezone': 'GMT',
+            'timeformat': 'unixtime',
+            # Open-Meteo defaults to km/h; thresholds and tools work in m/s
+            'wind_speed_unit': 'ms',
+        }
+        logger.debug(f"Fetching {frequency} forecast for {len(batch)} locations")
+        response = session.get(url, params=params, timeout=30)
+        response.raise_for_status()
+        data = response.json()
+        # A single location comes back as an object, several as a list
+        responses.extend(data if isinstance(data, list) else [data])
+    return ForecastStore.from_responses(locations, responses, variables, frequency)
+
+
+class ForecastStore:
+    """
+    Columnar forecast storage: one float32 array per variable, shaped
+    (location, time), plus a shared int64 time axis in unix seconds.
+
+    Saved stores are plain .npy files and are memory-mapped on load, so
+    aggregations over hundreds of sites only touch the pages they need.
+    """
+
+    def __init__(self, locations: List[Dict[str, Any]], times: np.ndarray,
+                 data: Dict[str, np.ndarray], frequency: str = 'hourly'):
+        self.locations = locations
+        self.times = times
+        self.data = data
+        self.frequency = frequency
+        self.names = np.array([loc['name'] for loc in locations])
+
+    @classmethod
+    def from_responses(cls, locations: Iterable, responses: Sequence[Dict[str, Any]],
+                       variables: Sequence[str], frequency: str = 'hourly') -> 'ForecastStore':
+        """Build a store from Open-Meteo JSON responses, one per location, in location order"""
+        locations = [normalize_location(location) for location in locations]
+        if len(locations) != len(responses):
+            raise ValueError(f"Got {len(responses)} forecasts for {len(locations)} locations")
+
+        series = [response.get(frequency, {}) for response in responses]
+        times = np.unique(np.concatenate([
+            np.asarray(s.get('time', []), dtype=np.int64) for s in series
+        ]))
+        data = {var: np.full((len(locations), len(times)), np.nan, dtype=np.float32) for var in variables}
+        for row, s in enumerate(series):
+            columns = np.searchsorted(times, np.asarray(s.get('time', []), dtype=np.int64))
+            for var in variables:
+                values = s.get(var)
+                if values is not None:
+                    # null entries become NaN
+                    data[var][row, columns] = np.asarray(values, dtype=np.float64)
+        return cls(locations, times, data, frequency)
+
+    def save(self, path: str) -> None:
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({
+                'locations': self.locations,
+                'variables': list(self.data),
+                'frequency': self.frequency,
+            }, f)
+        np.save(os.path.join(path, 'time.npy'), self.times)
+        for var, values in self.data.items():
+            np.save(os.path.join(path, f'{var}.npy'), values)
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'ForecastStore':
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        mode = 'r' if mmap else None
+        times = np.load(os.path.join(path, 'time.npy'), mmap_mode=mode)
+        data = {var: np.load(os.path.join(path, f'{var}.npy'), mmap_mode=mode) for var in meta['variables']}
+        return cls(meta['locations'], times, data, meta['frequency'])
+
+    def time_slice(self, start: Optional[int] = None, end: Optional[int] = None) -> slice:
+        """Column range covering unix times in [start, end)"""
+        lo = 0 if start is None else int(np.searchsorted(self.times, start, side='left'))
+        hi = len(self.times) if end is None else int(np.searchsorted(self.times, end, side='left'))
+        return slice(lo, hi)
+
+    def window(self, variable: str, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        return self.data[variable][:, self.time_slice(start, end)]
+
+    def aggregate(self, variable: str, how: str = 'max', start: Optional[int] = None,
+                  end: Optional[int] = None) -> np.ndarray:
+        """Per-location min/max/mean/sum over a time window, ignoring missing values"""
+        reducers = {'min': np.nanmin, 'max': np.nanmax, 'mean': np.nanmean, 'sum': np.nansum}
+        if how not in reducers:
+            raise ValueError(f"Unknown aggregation '{how}', expected one of {sorted(reducers)}")
+        values = self.window(variable, start, end)
+        if values.shape[1] == 0:
+            return np.full(values.shape[0], np.nan, dtype=np.float32)
+        with warnings.catch_warnings():
+            # all-NaN rows (locations without data) legitimately reduce to NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            return reducers[how](values, axis=1)
+
+    def rolling_mean(self, variable: str, steps: int) -> np.ndarray:
+        """
+        Trailing mean over `steps` time steps for every location, shape
+        (location, time - steps + 1). Like aggregate, missing values are
+        ignored; a window with no values at all is NaN.
+        """
+        if not 1 <= steps <= len(self.times):
+            raise ValueError(f"steps must be between 1 and {len(self.times)}, got {steps}")
+        values = np.asarray(self.data[variable], dtype=np.float64)
+        valid = ~np.isnan(values)
+        zeros = np.zeros((values.shape[0], 1))
+        sums = np.concatenate([zeros, np.cumsum(np.where(valid, values, 0.0), axis=1)], axis=1)
+        counts = np.concatenate([zeros, np.cumsum(valid, axis=1)], axis=1)
+        window_sums = sums[:, steps:] - sums[:, :-steps]
+        window_counts = counts[:, steps:] - counts[:, :-steps]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return np.where(window_counts > 0, window_sums / window_counts, np.nan)
+
+    def threshold_crossings(self, variable: str, threshold: float, above: bool = True,
+                            start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """Boolean (location, time) mask of steps where the series crosses the threshold"""
+        values = self.window(variable, start, end)
+        over = values > threshold if above else values < threshold
+        crossings = np.zeros_like(over)
+        crossings[:, 0] = over[:, 0]
+        crossings[:, 1:] = over[:, 1:] & ~over[:, :-1]
+        return crossings
+
+    def first_exceedance(self, variable: str, threshold: float, start: Optional[int] = None,
+                         end: Optional[int] = None) -> np.ndarray:
+        """Unix time each location first exceeds the threshold, -1 where it never does"""
+        window = self.time_slice(start, end)
+        over = self.data[variable][:, window] > threshold
+        times = self.times[window]
+        if len(times) == 0:
+            return np.full(over.shape[0], -1, dtype=np.int64)
+        first = np.argmax(over, axis=1)
+        return np.where(over.any(axis=1), times[first], -1)
+
+    def sites_exceeding(self, variable: str, threshold: float, start: Optional[int] = None,
+                        end: Optional[int] = None) -> List[Tuple[str, float, int]]:
+        """(name, peak value, first exceedance time) for every location above the threshold"""
+        peaks = self.aggregate(variable, 'max', start, end)
+        mask = peaks > threshold
+        first = self.first_exceedance(variable, threshold, start, end)
+        return [
+            (str(name), float(peak), int(when))
+            for name, peak, when in zip(self.names[mask], peaks[mask], first[mask])
+        ]
+
+
+def make_forecast_tools(store: ForecastStore) -> list:
+    """Agent tools answering forecast questions from a loaded store"""
+
+    def sites_above_threshold(variable: str, threshold: float, hours: int = 168) -> str:
+        """Find locations whose forecast exceeds a threshold.
+
+        Args:
+            variable (str): Forecast variable, e.g. "wind_speed_10m" or "temperature_2m".
+            threshold (float): Value the forecast must exceed.
+            hours (int): How many hours ahead to look, starting from the first forecast step.
+
+        Returns:
+            str: JSON list of locations with their peak value and first exceedance time.
+        """
+        if variable not in store.data:
+            return json.dumps({'error': f"Unknown variable {variable}, available: {list(store.data)}"})
+        start = int(store.times[0]) if len(store.times) else None
+        end = None if start is None else start + int(hours) * 3600
+        sites = store.sites_exceeding(variable, threshold, start, end)
+        return json.dumps([
+            {'location': name, 'peak': round(peak, 2), 'first_exceeds_at': when}
+            for name, peak, when in sites
+        ])
+
+    def aggregate_forecast(variable: str, how: str = "max", hours: int = 168) -> str:
+        """Aggregate a forecast variable for every location.
+
+        Args:
+            variable (str): Forecast variable, e.g. "temperature_2m".
+            how (str): One of "min", "max", "mean" or "sum".
+            hours (int): How many hours ahead to aggregate over.
+
+        Returns:
+            str: JSON object mapping location name to the aggregated value.
+        """
+        if variable not in store.data:
+            return json.dumps({'error': f"Unknown variable {variable}, available: {list(store.data)}"})
+        start = int(store.times[0]) if len(store.times) else None
+        end = None if start is None else start + int(hours) * 3600
+        try:
+            values = store.aggregate(variable, how, start, end)
+        except ValueError as e:
+            return json.dumps({'error': str(e)})
+        return json.dumps({
+            str(name): (None if np.isnan(value) else round(float(value), 2))
+            for name, value in zip(store.names, values)
+        })
+
+    return [sites_above_threshold, aggregate_forecast]
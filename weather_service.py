@@ -0,0 +1,302 @@
+import argparse
+import importlib.util
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+from urllib.parse import parse_qs, urlsplit
+
+from dotenv import load_dotenv
+
+from weather_cache import WeatherCache, is_error_result
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH_SIZE = 100
+
+
+class ServiceBusy(Exception):
+    """No worker became free within the queue timeout"""
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key: the first caller runs the
+    function, everyone arriving while it runs waits for and shares its result.
+    """
+
+    class _Call:
+        __slots__ = ('done', 'result', 'error')
+
+        def __init__(self):
+            self.done = threading.Event()
+            self.result = None
+            self.error = None
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls: Dict[str, 'SingleFlight._Call'] = {}
+        self.coalesced = 0
+
+    def do(self, key: str, fn: Callable[[], Any]) -> Any:
+        with self.lock:
+            call = self.calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = self.calls[key] = self._Call()
+                leader = True
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+            finally:
+                with self.lock:
+                    del self.calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+    def in_flight(self) -> int:
+        with self.lock:
+            return len(self.calls)
+
+
+class WeatherHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    # Bursts of simultaneous clients are the point; don't drop their connects
+    request_queue_size = 1024
+
+
+class WeatherService:
+    """
+    Long-running wrapper around WeatherAgent.query_weather
+
+    Identical in-flight requests are coalesced, so a burst of requests for
+    one city costs one geocode, one forecast fetch and one LLM summary. At
+    most `workers` upstream queries run at once; callers wait up to
+    `queue_timeout` seconds for a free worker. With `ttl` > 0 results are also
+    served from a stale-while-revalidate WeatherCache.
+    """
+
+    def __init__(self, agent_factory: Callable[[], Any], workers: int = 8, queue_timeout: float = 30,
+                 ttl: float = 0, refreshes_per_minute: float = 30):
+        self.agent_factory = agent_factory
+        self.local = threading.local()
+        self.flight = SingleFlight()
+        self.slots = threading.BoundedSemaphore(workers)
+        self.workers = workers
+        self.queue_timeout = queue_timeout
+        self.batch_pool = ThreadPoolExecutor(max_workers=MAX_BATCH_SIZE, thread_name_prefix='weather-batch')
+        self.cache = None
+        if ttl > 0:
+            self.cache = WeatherCache(self._query, ttl=ttl, refresh_ahead=min(60, ttl / 5),
+                                      refreshes_per_minute=refreshes_per_minute).start()
+
+        self.metrics_lock = threading.Lock()
+        self.started_at = time.time()
+        self.counters = {'requests_total': 0, 'batch_requests_total': 0, 'upstream_queries_total': 0,
+                         'errors_total': 0, 'busy_rejections_total': 0}
+        self.active_queries = 0
+        self.latencies = deque(maxlen=1000)
+
+    def close(self) -> None:
+        if self.cache is not None:
+            self.cache.stop()
+        self.batch_pool.shutdown(wait=False)
+
+    def _agent(self):
+        # WeatherAgent instances keep per-conversation state; one per thread,
+        # reset before every query so unrelated cities never share a prompt
+        # and the history does not grow for the life of the service
+        if not hasattr(self.local, 'agent'):
+            self.local.agent = self.agent_factory()
+        elif hasattr(self.local.agent, 'reset'):
+            self.local.agent.reset()
+        return self.local.agent
+
+    def _count(self, name: str, amount: int = 1) -> None:
+        with self.metrics_lock:
+            self.counters[name] += amount
+
+    def _query(self, city: str) -> Dict[str, Any]:
+        """Run one upstream query, coalesced per city and bounded by the worker slots"""
+        def run():
+            if not self.slots.acquire(timeout=self.queue_timeout):
+                self._count('busy_rejections_total')
+                raise ServiceBusy(f"No worker free within {self.queue_timeout}s")
+            try:
+                with self.metrics_lock:
+                    self.counters['upstream_queries_total'] += 1
+                    self.active_queries += 1
+                return self._agent().query_weather(city)
+            finally:
+                with self.metrics_lock:
+                    self.active_queries -= 1
+                self.slots.release()
+
+        return self.flight.do(WeatherCache.key(city), run)
+
+    def get_weather(self, city: str) -> Dict[str, Any]:
+        started = time.perf_counter()
+        self._count('requests_total')
+        try:
+            result = self.cache.get(city) if self.cache is not None else self._query(city)
+        except ServiceBusy:
+            raise
+        except Exception as e:
+            logger.error(f"Error querying weather for {city}: {e}")
+            result = {'error': str(e)}
+        if is_error_result(result):
+            self._count('errors_total')
+        with self.metrics_lock:
+            self.latencies.append(time.perf_counter() - started)
+        return result
+
+    def get_weather_batch(self, cities) -> Dict[str, Dict[str, Any]]:
+        self._count('batch_requests_total')
+        unique = list(dict.fromkeys(cities))
+
+        def one(city):
+            try:
+                return self.get_weather(city)
+            except ServiceBusy as e:
+                return {'error': str(e)}
+
+        return dict(zip(unique, self.batch_pool.map(one, unique)))
+
+    def metrics_text(self) -> str:
+        """Metrics in the Prometheus text exposition format"""
+        with self.metrics_lock:
+            counters = dict(self.counters)
+            active = self.active_queries
+            latencies = sorted(self.latencies)
+        lines = []
+        for name, value in counters.items():
+            lines.append(f"weather_service_{name} {value}")
+        lines.append(f"weather_service_coalesced_requests_total {self.flight.coalesced}")
+        lines.append(f"weather_service_in_flight_queries {self.flight.in_flight()}")
+        lines.append(f"weather_service_active_upstream_queries {active}")
+        lines.append(f"weather_service_workers {self.workers}")
+        lines.append(f"weather_service_uptime_seconds {time.time() - self.started_at:.0f}")
+        for quantile in (0.5, 0.95, 0.99):
+            value = latencies[min(len(latencies) - 1, int(quantile * len(latencies)))] if latencies else 0.0
+            lines.append(f'weather_service_request_seconds{{quantile="{quantile}"}} {value:.4f}')
+        if self.cache is not None:
+            for name, value in self.cache.stats.items():
+                lines.append(f"weather_service_cache_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+
+def make_handler(service: WeatherService):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def send_json(self, status: int, data: Any) -> None:
+            self.send_body(status, json.dumps(data).encode("utf-8"), "application/json")
+
+        def send_body(self, status: int, body: bytes, content_type: str) -> None:
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/health":
+                self.send_json(200, {"status": "ok"})
+            elif url.path == "/metrics":
+                self.send_body(200, service.metrics_text().encode("utf-8"), "text/plain; version=0.0.4")
+            elif url.path == "/weather":
+                city = (parse_qs(url.query).get("city") or [""])[0].strip()
+                if not city:
+                    self.send_json(400, {"error": "Missing city parameter"})
+                    return
+                try:
+                    result = service.get_weather(city)
+                except ServiceBusy as e:
+                    self.send_json(503, {"error": str(e)})
+                    return
+                self.send_json(502 if is_error_result(result) else 200, result)
+            else:
+                self.send_json(404, {"error": "Not found"})
+
+        def do_POST(self):
+            if urlsplit(self.path).path != "/weather/batch":
+                self.send_json(404, {"error": "Not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                cities = json.loads(self.rfile.read(length) or b"{}").get("cities")
+            except (ValueError, AttributeError):
+                self.send_json(400, {"error": "Body must be JSON like {\"cities\": [...]}"})
+                return
+            if not isinstance(cities, list) or not all(isinstance(c, str) and c.strip() for c in cities):
+                self.send_json(400, {"error": "cities must be a list of city names"})
+                return
+            if len(cities) > MAX_BATCH_SIZE:
+                self.send_json(400, {"error": f"At most {MAX_BATCH_SIZE} cities per batch"})
+                return
+            self.send_json(200, service.get_weather_batch(cities))
+
+        def log_message(self, format, *args):
+            logger.debug("%s - " + format, self.address_string(), *args)
+
+    return Handler
+
+
+def load_agent_class(version: str):
+    """WeatherAgent from weather_agent_v2.py or weather_agent-v3.py"""
+    filename = "weather_agent_v2.py" if version == "v2" else "weather_agent-v3.py"
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), filename)
+    spec = importlib.util.spec_from_file_location(f"weather_agent_{version}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.WeatherAgent
+
+
+def serve(host: str = "127.0.0.1", port: int = 8080, agent: str = "v3", workers: int = 8,
+          queue_timeout: float = 30, ttl: float = 0, refreshes_per_minute: float = 30,
+          agent_factory: Optional[Callable[[], Any]] = None) -> None:
+    service = WeatherService(agent_factory or load_agent_class(agent), workers=workers,
+                             queue_timeout=queue_timeout, ttl=ttl, refreshes_per_minute=refreshes_per_minute)
+    server = WeatherHTTPServer((host, port), make_handler(service))
+    logger.info(f"Weather service listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="HTTP service around WeatherAgent.query_weather")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--agent", choices=["v2", "v3"], default="v3", help="Which WeatherAgent to serve")
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent upstream queries")
+    parser.add_argument("--queue-timeout", type=float, default=30, help="Seconds to wait for a free worker")
+    parser.add_argument("--ttl", type=float, default=0, help="Cache results this many seconds (0 disables)")
+    parser.add_argument("--refreshes-per-minute", type=float, default=30, help="Background cache refresh budget")
+    args = parser.parse_args()
+    serve(args.host, args.port, args.agent, args.workers, args.queue_timeout, args.ttl, args.refreshes_per_minute)
+
+
+if __name__ == "__main__":
+    main()